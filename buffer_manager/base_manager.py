@@ -1,88 +1,425 @@
-import streamlit as st
-import pandas as pd
-from guardrails.bedrock import apply_guardrail
+import asyncio
+import math
+import threading
 import time
+from collections import deque, namedtuple
+from guardrails.bedrock import TEXT_UNIT, apply_guardrail, text_units
+from guardrails.local import StreamingMatcher
+from buffer_manager.dispatcher import HIGH, NORMAL, dispatcher
+from buffer_manager.metrics import StreamMetrics, registry
+from buffer_manager.renderer import Renderer, StreamlitRenderer
+from buffer_manager.segmenter import Segmenter, align_filtered, split_filtered
+from buffer_manager.text_buffer import TextBuffer
+
+
+# 가드레일 검사를 마치고 내보낼 수 있게 된 텍스트 구간
+Segment = namedtuple("Segment", ["text", "status", "violations", "response"])
+
+
+def submit_input_check(text, guardrail_config):
+    """사용자 입력(INPUT) 가드레일 검사를 공유 디스패처에서 먼저 실행하도록 제출하고 Future 반환
+
+    LLM 호출과 동시에 시작한 뒤 process_stream / stream 의 input_check 로 넘긴다.
+    """
+    return dispatcher.submit(
+        lambda: apply_guardrail(text=text, text_type="INPUT", **guardrail_config),
+        priority=HIGH
+    )
+
+
+class SegmentStream:
+    """승인된 세그먼트를 동기(for) 또는 비동기(async for)로 꺼내는 반복자"""
+
+    def __init__(self, manager, response, input_check=None):
+        self.manager = manager
+        self.response = response
+        self.input_check = input_check
+
+    def __iter__(self):
+        return self.manager._iter_segments(self.response, self.input_check)
+
+    def __aiter__(self):
+        return self._aiter()
+
+    async def _aiter(self):
+        # 이벤트 스트림 읽기와 가드레일 호출은 블로킹이므로 스레드에서 한 단계씩 진행
+        loop = asyncio.get_running_loop()
+        iterator = iter(self)
+        done = object()
+        while True:
+            segment = await loop.run_in_executor(None, next, iterator, done)
+            if segment is done:
+                return
+            yield segment
 
 
 class BaseManager:
-    """스트리밍 응답을 처리하는 기본 관리자 클래스"""
+    """스트리밍 응답을 처리하는 기본 관리자 클래스
 
-    def __init__(self, placeholder, buffer_size, guardrail_config, debug_mode):
+    placeholder 로 Streamlit 컨테이너, Renderer 인스턴스 또는 None(화면 출력 없음)을 받는다.
+    segmenter 를 주지 않으면 겹침 구간 없이 문장·어절 경계에서 버퍼를 자른다.
+    """
+
+    def __init__(self, placeholder, buffer_size, guardrail_config, debug_mode, segmenter=None):
         """초기 설정 및 상태 초기화"""
         self.placeholder = placeholder
         self.buffer_size = buffer_size
         self.guardrail_config = guardrail_config
         self.debug_mode = debug_mode
+        self.segmenter = segmenter if segmenter is not None else Segmenter()
+
+        if placeholder is None:
+            self.renderer = Renderer()
+        elif isinstance(placeholder, Renderer):
+            self.renderer = placeholder
+        else:
+            self.renderer = StreamlitRenderer(placeholder)
 
         # 공통 상태
-        self.buffer_text = ""
-        self.full_text = ""
+        self.buffer_text = TextBuffer()
+        self.full_text = TextBuffer()
         self.content_placeholder = None
         self.start_time = None
         self.b_first_write = True
+        self.segments = deque()
+        self.overlap_text = ""  # 다음 검사에 다시 포함할 직전 구간의 꼬리
+        self.withheld_text = ""  # 직전 검사 결과 중 꼬리 부분 (다음 검사가 꼬리를 다시 포함하지 않으면 내보냄)
+        self.released_overlap = 0  # 다음 검사가 다시 포함할 꼬리 중 치환된 구간에 걸려 이미 내보낸 앞부분 글자 수
+        self.cut_count = 0
+        # 이 세션이 Bedrock 에 실제로 보낸 가드레일 검사량 (skipped_calls: 캐시·로컬 판정으로 보내지 않은 검사 수)
+        self.usage = {"calls": 0, "characters": 0, "text_units": 0, "skipped_calls": 0}
+        self._usage_lock = threading.Lock()
+        self.stopped = False  # 차단되어 생성 도중 스트림을 닫았는지
+        self.blocked = False  # 차단 결과를 내보냈는지
+        self.generated_chars = 0
+        self.approved_chars = 0
+        self.metadata = None
+        self.metrics = StreamMetrics(type(self).__name__)
+        self.metrics_summary = None  # 스트림 처리가 끝나면 단계별 지연·처리량 요약
+
+        # 로컬 가드레일이 설정된 경우 델타 단위로 금지어 감시
+        local_guardrail = guardrail_config.get("local_guardrail")
+        self.stream_matcher = StreamingMatcher(local_guardrail.automaton) if local_guardrail else None
 
-    def process_stream(self, response):
-        """스트림 응답을 처리하고 결과 텍스트 반환"""
+    def process_stream(self, response, input_check=None):
+        """스트림 응답을 처리하고 결과 텍스트 반환
+
+        input_check(submit_input_check 의 Future)를 주면 입력 검사 결과가 나올 때까지 출력을 보류하고,
+        입력이 차단되면 LLM 스트림을 즉시 닫고 차단 메시지만 표시한다.
+        """
         try:
-            stream = response.get('stream')
-            if not stream:
-                return ""
-
-            for event in stream:
-                if 'messageStart' in event:
-                    self.placeholder.divider()
-                    self.start_time = time.time()
-                if 'contentBlockDelta' in event:
-                    should_stop = self._handle_content(event['contentBlockDelta']['delta']['text'])
-                    if should_stop:
-                        return self.full_text
-                elif 'messageStop' in event:
-                    self._handle_stream_end()
-                elif 'metadata' in event:
-                    self.placeholder.divider()
-                    # self.placeholder.json(event['metadata'])
-
-            return self.full_text
+            for _ in self._iter_segments(response, input_check):
+                pass
+            return self.full_text.getvalue()
 
         except Exception as e:
-            st.error(f"스트리밍 처리 중 오류 발생: {str(e)}")
+            self.renderer.error(f"스트리밍 처리 중 오류 발생: {str(e)}")
             return ""
 
-    def _apply_guardrail(self):
-        """버퍼 텍스트에 가드레일 적용"""
-        return apply_guardrail(
-            text=self.buffer_text,
+    def stream(self, response, input_check=None):
+        """승인된 세그먼트를 내보낼 수 있게 되는 즉시 반환하는 반복자 (for / async for 모두 지원)"""
+        return SegmentStream(self, response, input_check)
+
+    def _iter_segments(self, response, input_check=None):
+        """이벤트를 처리하면서 쌓인 세그먼트를 순서대로 생성"""
+        stream = response.get('stream')
+        if not stream:
+            return
+
+        try:
+            events = stream if input_check is None else self._gate_events(stream, input_check)
+            for event in events:
+                should_stop = self._handle_event(stream, event)
+                while self.segments:
+                    yield self.segments.popleft()
+                if should_stop:
+                    return
+
+            if input_check is not None and self._input_blocked(input_check):
+                self._handle_input_block(*input_check.result())
+                while self.segments:
+                    yield self.segments.popleft()
+        finally:
+            self._finalize()
+            self._record_metrics()
+
+    def _gate_events(self, stream, input_check):
+        """입력 검사 결과가 나올 때까지 이벤트를 보류하고, 통과하면 보류한 이벤트부터 내보냄"""
+        input_check.add_done_callback(lambda future: self._on_input_checked(stream, future))
+
+        events = iter(stream)
+        held = []
+        try:
+            for event in events:
+                held.append(event)
+                # 응답이 끝날 때까지 결과가 없으면 결과를 기다림
+                if not input_check.done() and 'messageStop' not in event and 'metadata' not in event:
+                    continue
+                if self._input_blocked(input_check):
+                    return
+                yield from held
+                yield from events
+                return
+        except Exception:
+            # 차단으로 스트림을 닫아 읽기가 실패한 경우
+            if not self._input_blocked(input_check):
+                raise
+            return
+        if not self._input_blocked(input_check):
+            yield from held
+
+    def _on_input_checked(self, stream, input_check):
+        """입력이 차단되었거나 검사에 실패하면 다음 이벤트를 기다리지 않고 바로 스트림을 닫음"""
+        if input_check.exception() is not None or input_check.result()[0] == "blocked":
+            self._close_stream(stream)
+
+    @staticmethod
+    def _input_blocked(input_check):
+        """입력 검사 결과가 차단인지 (결과가 없으면 기다림)"""
+        return input_check.result()[0] == "blocked"
+
+    def _handle_input_block(self, status, violations, filtered_text, response):
+        """입력 차단 시 출력 대신 차단 메시지 표시"""
+        # 모델 스트림은 _on_input_checked 에서 닫았거나 보류한 이벤트를 버렸으므로 생성 도중 중단한 것으로 기록
+        self.stopped = True
+        self.renderer.start()
+        self._ensure_placeholder()
+        self.content_placeholder.write(filtered_text)
+        self.full_text += filtered_text
+        self._emit(filtered_text, status, violations, response)
+        self._show_results(status, violations, response)
+        self.renderer.end()
+
+    def _handle_event(self, stream, event):
+        """스트림 이벤트 하나를 처리하고 중단 여부 반환"""
+        if 'messageStart' in event:
+            self.renderer.start()
+            self.start_time = time.time()
+            self.metrics.start()
+        if 'contentBlockDelta' in event:
+            new_text = event['contentBlockDelta']['delta']['text']
+            self.generated_chars += len(new_text)
+            self.metrics.token(len(new_text))
+            if self._match_stream(new_text) or self._handle_content(new_text):
+                # 차단된 답변의 나머지는 생성·검사하지 않도록 연결을 닫음
+                self.stopped = True
+                self._close_stream(stream)
+                self.renderer.end()
+                return True
+            return False
+        elif 'messageStop' in event:
+            self._handle_stream_end()
+        elif 'metadata' in event:
+            self.metadata = event['metadata']
+            self.renderer.end()
+        return False
+
+    def generation_stats(self):
+        """생성된 글자 수와 표시하지 않고 버린 글자 수, metadata 의 출력 토큰 수 반환
+
+        스트림을 중간에 닫으면 metadata 가 오지 않으므로 output_tokens 와 discarded_tokens 는 None 이다.
+        """
+        discarded_chars = max(0, self.generated_chars - self.approved_chars)
+        output_tokens = None
+        discarded_tokens = None
+        if self.metadata is not None:
+            output_tokens = self.metadata.get('usage', {}).get('outputTokens')
+            if output_tokens is not None and self.generated_chars:
+                discarded_tokens = round(output_tokens * discarded_chars / self.generated_chars)
+        return {
+            "stopped_early": self.stopped and self.metadata is None,
+            "generated_chars": self.generated_chars,
+            "discarded_chars": discarded_chars,
+            "output_tokens": output_tokens,
+            "discarded_tokens": discarded_tokens
+        }
+
+    def _emit(self, text, status, violations, response):
+        """검사가 끝난 세그먼트를 내보내기 대기열에 추가"""
+        if status == "blocked":
+            self.blocked = True
+        else:
+            self.approved_chars += len(text)
+            self.metrics.output(len(text))
+        self.segments.append(Segment(text, status, violations, response))
+
+    def _match_stream(self, new_text):
+        """델타를 로컬 매처에 전달하고 금지어가 완성되면 즉시 차단 처리"""
+        if self.stream_matcher is None:
+            return False
+
+        matches = self.stream_matcher.feed(new_text)
+        if not matches:
+            return False
+
+        violations = []
+        for word in dict.fromkeys(word for word, _ in matches):
+            violations.append({
+                "Category": "Custom word filters",
+                "Action": "BLOCKED",
+                "Name": word
+            })
+        self._handle_local_block(violations)
+        return True
+
+    def _handle_local_block(self, violations):
+        """로컬 금지어 발견 시 검사 전 버퍼를 폐기하고 차단 결과 표시"""
+        local_guardrail = self.guardrail_config["local_guardrail"]
+        response = local_guardrail.blocked_response()
+        self.full_text += local_guardrail.blocked_message
+        self._emit(local_guardrail.blocked_message, "blocked", violations, response)
+        self._show_results("blocked", violations, response)
+        self._reset_buffer()
+
+    @staticmethod
+    def _close_stream(stream):
+        """남은 생성을 받지 않도록 이벤트 스트림 종료"""
+        close = getattr(stream, 'close', None)
+        if close is not None:
+            close()
+
+    def _cut_buffer(self, size, final=False):
+        """버퍼에서 경계에 맞춰 다음 검사 구간을 잘라 (검사할 텍스트, 앞에 다시 포함한 겹침 길이, 꼬리) 반환
+
+        겹침 구간을 포함한 검사 텍스트가 버퍼 크기에 필요한 텍스트 단위 수를 넘지 않도록 자르고, 더 기다려야 하면 None.
+        마지막 구간은 겹침 때문에 텍스트 단위가 늘어나면 겹침 없이 검사한다 (겹침은 직전 검사 결과대로 내보냄).
+        """
+        text = self.buffer_text.getvalue()
+        limit = max(1, math.ceil(size / TEXT_UNIT)) * TEXT_UNIT - len(self.overlap_text)
+        split = self.segmenter.split(text, size, final, limit)
+        if split is None:
+            return None
+
+        cut, tail_start = split
+        self.cut_count += 1
+        overlap = self.overlap_text
+        if final and text_units(overlap + text[:cut]) > text_units(text[:cut]):
+            overlap = ""
+        check_text = overlap + text[:cut]
+        tail = text[tail_start:cut]
+        self.overlap_text = tail
+        self.buffer_text.clear()
+        self.buffer_text += text[cut:]
+        return check_text, len(overlap), tail
+
+    def _count_usage(self, check_text, source=None):
+        """검사 요청량 기록 (검사 스레드에서 호출될 수 있음, source 가 있으면 Bedrock 을 호출하지 않은 결과)"""
+        with self._usage_lock:
+            if source is not None:
+                self.usage["skipped_calls"] += 1
+                return
+            self.usage["calls"] += 1
+            self.usage["characters"] += len(check_text)
+            self.usage["text_units"] += text_units(check_text)
+
+    def usage_stats(self):
+        """가드레일 호출 수, 글자 수, 텍스트 단위 수와 단위 채움 비율 반환"""
+        with self._usage_lock:
+            stats = dict(self.usage)
+        units = stats["text_units"]
+        stats["unit_fill"] = stats["characters"] / (units * TEXT_UNIT) if units else 0.0
+        return stats
+
+    def _release_text(self, status, check_text, filtered_text, overlap_length, tail):
+        """검사 결과에서 다음 검사로 넘긴 꼬리를 뺀 표시할 텍스트와 그 구간의 filtered_text 기준 (시작, 끝) 반환
+
+        꼬리는 다음 검사 결과로 표시한다. 꼬리 시작이 치환된 구간 안이면 구간 전체를 이번 결과로 내보내고,
+        다음 검사 결과에서는 다시 포함한 꼬리 중 그만큼을 건너뛴다.
+        검사가 직전 꼬리를 다시 포함하지 않았으면(overlap_length 0) 보관한 직전 결과의 꼬리를 앞에 붙인다.
+        """
+        withheld = "" if overlap_length else self.withheld_text
+        released = self.released_overlap if overlap_length else 0
+        self.withheld_text = ""
+        self.released_overlap = 0
+        if status == "blocked":
+            return filtered_text, 0, len(filtered_text)
+
+        start = split_filtered(check_text, filtered_text, released) if released else 0
+        if not tail:
+            return withheld + filtered_text[start:], start, len(filtered_text)
+        tail_start = len(check_text) - len(tail)
+        aligned, split = align_filtered(check_text, filtered_text, tail_start)
+        split = max(start, split)
+        self.withheld_text = filtered_text[split:]
+        self.released_overlap = aligned - tail_start
+        return withheld + filtered_text[start:split], start, split
+
+    def _priority(self, final=False):
+        """첫 버퍼와 스트림 종료 시 남은 버퍼는 첫 응답 시간과 종료 시간을 좌우하므로 먼저 검사"""
+        return HIGH if final or self.cut_count <= 1 else NORMAL
+
+    def _check(self, text, priority=NORMAL):
+        """공유 디스패처에서 가드레일을 적용하고 결과를 기다림"""
+        return dispatcher.submit(self._apply_guardrail, text, priority=priority, session=self).result()
+
+    def _apply_guardrail(self, text=None):
+        """버퍼 텍스트(또는 주어진 텍스트)에 가드레일 적용"""
+        text = self.buffer_text.getvalue() if text is None else text
+        start = time.monotonic()
+        result = apply_guardrail(
+            text=text,
             text_type="OUTPUT",
             **self.guardrail_config
         )
+        wall_time = time.monotonic() - start
+        # 캐시 결과는 원래 호출의 처리 시간을 그대로 갖고 있으므로 Bedrock 을 호출한 경우만 읽음
+        source = result[3].get('source')
+        # 실행되기 전에 취소된 검사는 세지 않도록 실행한 검사만 기록
+        self._count_usage(text, source)
+        latencies = [] if source is not None else [
+            assessment['invocationMetrics']['guardrailProcessingLatency']
+            for assessment in result[3].get('assessments', [])
+            if 'guardrailProcessingLatency' in assessment.get('invocationMetrics', {})
+        ]
+        self._observe_check(text, wall_time, sum(latencies) / 1000 if latencies else None, result[0], source)
+        return result
+
+    def _observe_check(self, text, wall_time, processing_latency, status, source=None):
+        """가드레일 검사 한 번의 지연(초) 기록, processing_latency 는 invocationMetrics 의 서비스 처리 시간(초)
+
+        source 는 Bedrock 을 호출하지 않은 결과의 출처("LOCAL", "CACHE")이며 지연 집계에서 제외된다.
+        """
+        self.metrics.check(len(text), wall_time, processing_latency, status, source)
+
+    def _record_metrics(self):
+        """세션 요약을 만들어 전역 레지스트리에 기록"""
+        metadata = self.metadata or {}
+        self.metrics_summary = self.metrics.summary(
+            usage=self.usage_stats(),
+            generation=self.generation_stats(),
+            model_usage=metadata.get('usage'),
+            model_latency_ms=metadata.get('metrics', {}).get('latencyMs'),
+            stall_time=self._stall_time(),
+            blocked=self.blocked
+        )
+        registry.record(self.metrics_summary)
+        if self.debug_mode:
+            self.renderer.show_metrics(self.metrics_summary)
+
+    def _stall_time(self):
+        """표시가 멈춰 있던 시간 (표시 속도를 조절하지 않는 관리자는 None)"""
+        return None
 
     def _show_results(self, status, violations, response):
         """가드레일 검사 결과를 UI에 표시"""
         if self.debug_mode:
             # debug mode 일때만 출력
-            status_messages = {
-                "blocked": ("가드레일 검사 결과 : 🚫 Blocked", "error"),
-                "anonymized": ("가드레일 검사 결과 : ⚠️ Anonymized", "warning"),
-                "passed": ("가드레일 검사 결과 : ✅ Passed", "success")
-            }
-
-            message, method = status_messages.get(status)
-            getattr(self.placeholder, method)(message)
-
-            with self.placeholder.expander("가드레일 검사 Trace"):
-                st.dataframe(pd.DataFrame(violations), hide_index=True, use_container_width=True)
-                st.json(response)
+            self.renderer.show_results(status, violations, response)
 
     def _ensure_placeholder(self):
         """UI 표시를 위한 플레이스홀더 생성"""
         if self.content_placeholder is None:
-            self.content_placeholder = self.placeholder.empty()
+            self.content_placeholder = self.renderer.new_block()
 
     def _reset_buffer(self):
         """버퍼 와 플레이스홀더 초기화"""
-        self.buffer_text = ""
+        self.buffer_text.clear()
+        self.overlap_text = ""
         self.content_placeholder = None
 
+    def _finalize(self):
+        """스트림 처리가 끝나거나 중단될 때 백그라운드 자원 정리"""
+
     # 하위 클래스에서 구현해야 하는 메서드들
     def _handle_content(self, new_text):
         """새로운 텍스트 컨텐츠 처리"""
@@ -96,5 +433,5 @@ class BaseManager:
         if self.b_first_write:
             end_time = time.time()
             elapsed_time = end_time - self.start_time
-            self.placeholder.info(f"답변 Start (소요 시간: {elapsed_time:.2f} 초)")
+            self.renderer.info(f"답변 Start (소요 시간: {elapsed_time:.2f} 초)")
             self.b_first_write = False
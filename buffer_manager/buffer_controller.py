@@ -0,0 +1,141 @@
+import threading
+import time
+
+
+class RateProfile:
+    """모델별로 학습한 토큰 도착 속도(초당 글자 수)와 가드레일 지연(초), 세션 간 공유"""
+
+    def __init__(self, smoothing=0.3):
+        self.smoothing = smoothing
+        self.arrival_cps = None
+        self.latency = None
+        self._lock = threading.Lock()
+
+    def update(self, arrival_cps=None, latency=None):
+        """스트림 하나의 측정값을 지수 이동 평균으로 반영"""
+        with self._lock:
+            if arrival_cps is not None:
+                self.arrival_cps = _smooth(self.arrival_cps, arrival_cps, self.smoothing)
+            if latency is not None:
+                self.latency = _smooth(self.latency, latency, self.smoothing)
+
+    def snapshot(self):
+        with self._lock:
+            return self.arrival_cps, self.latency
+
+
+_profiles = {}
+_lock = threading.Lock()
+
+
+def get_profile(name):
+    """이름(모델 ID 등)별 공유 RateProfile 반환"""
+    with _lock:
+        if name not in _profiles:
+            _profiles[name] = RateProfile()
+        return _profiles[name]
+
+
+class BufferSizeController:
+    """토큰 도착 속도와 가드레일 지연으로 다음 버퍼 크기를 정하는 컨트롤러
+
+    승인된 텍스트가 다 표시되기 전에 다음 버퍼를 채우고 검사까지 마칠 수 있는 범위에서 가장 큰 버퍼를 고른다.
+        크기 = 버퍼에 쌓인 글자 + 도착 속도 × (표시 대기 글자 / playout_cps - 검사 지연) × safety
+    결과는 [min_size, max_size] 로 제한하며, 측정값이 없으면 profile 의 이전 값을 쓰고 그것도 없으면 None 을 반환한다.
+    """
+
+    def __init__(self, min_size, max_size, playout_cps, profile=None, smoothing=0.3, safety=0.8,
+                 clock=time.monotonic):
+        self.min_size = min(min_size, max_size)
+        self.max_size = max_size
+        self.playout_cps = playout_cps
+        self.profile = profile
+        self.smoothing = smoothing
+        self.safety = safety
+        self.clock = clock
+
+        self.first_arrival = None
+        self.last_arrival = None
+        self.arrived_chars = 0
+        self.latency = None
+        self.processing_latency = None
+        self.sizes = []
+        self._lock = threading.Lock()
+
+    def observe_text(self, count):
+        """도착한 델타의 글자 수 기록"""
+        now = self.clock()
+        if self.first_arrival is None:
+            # 첫 델타는 측정 구간의 시작점으로만 사용
+            self.first_arrival = now
+        else:
+            self.arrived_chars += count
+        self.last_arrival = now
+
+    def observe_latency(self, latency, processing_latency=None):
+        """가드레일 호출 지연(초) 기록, processing_latency 는 invocationMetrics 의 서비스 처리 시간(초)"""
+        with self._lock:
+            self.latency = _smooth(self.latency, latency, self.smoothing)
+            if processing_latency is not None:
+                self.processing_latency = _smooth(self.processing_latency, processing_latency, self.smoothing)
+
+    def arrival_rate(self):
+        """측정한 초당 도착 글자 수 (측정 구간이 짧으면 profile 값)"""
+        if self.first_arrival is not None and self.arrived_chars:
+            elapsed = self.last_arrival - self.first_arrival
+            if elapsed >= 0.2:
+                return self.arrived_chars / elapsed
+        return self._profile_value(0)
+
+    def current_latency(self):
+        """측정한 가드레일 지연 (없으면 profile 값)"""
+        with self._lock:
+            latency = self.latency
+        return latency if latency is not None else self._profile_value(1)
+
+    def next_size(self, buffered, queued_chars):
+        """버퍼에 buffered 글자가 있고 승인·검사 중인 텍스트가 queued_chars 글자일 때의 목표 버퍼 크기"""
+        rate = self.arrival_rate()
+        latency = self.current_latency()
+        if rate is None or latency is None:
+            return None
+
+        if self.playout_cps > 0:
+            budget = queued_chars / self.playout_cps - latency
+        else:
+            budget = float('inf')
+        size = buffered + rate * budget * self.safety
+        return int(min(self.max_size, max(self.min_size, size)))
+
+    def record(self, size):
+        """실제로 자른 버퍼 크기 기록"""
+        self.sizes.append(size)
+
+    def finish(self):
+        """이번 스트림의 측정값을 profile 에 반영"""
+        if self.profile is None:
+            return
+        rate = self.arrival_rate() if self.arrived_chars else None
+        with self._lock:
+            latency = self.latency
+        self.profile.update(rate, latency)
+
+    def stats(self):
+        """도착 속도, 지연, 선택한 버퍼 크기 반환"""
+        with self._lock:
+            latency, processing_latency = self.latency, self.processing_latency
+        return {
+            "arrival_cps": self.arrival_rate(),
+            "latency": latency,
+            "processing_latency": processing_latency,
+            "buffer_sizes": list(self.sizes)
+        }
+
+    def _profile_value(self, index):
+        if self.profile is None:
+            return None
+        return self.profile.snapshot()[index]
+
+
+def _smooth(current, value, smoothing):
+    return value if current is None else current + smoothing * (value - current)
@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from guardrails.bedrock import limiter
+
+
+# 우선순위 (값이 작을수록 먼저 실행)
+HIGH = 0    # 첫 응답 시간을 좌우하는 초기 버퍼, 스트림 종료 시 남은 버퍼
+NORMAL = 1  # 그 밖의 버퍼
+
+
+class GuardrailDispatcher:
+    """모든 세션의 가드레일 검사를 우선순위와 세션 간 공정성에 따라 제한된 스레드로 실행하는 디스패처
+
+    우선순위가 높은 작업을 먼저 실행하고, 같은 우선순위 안에서는 세션을 돌아가며 하나씩 실행한다.
+    capacity 는 현재 동시에 실행할 수 있는 작업 수를 반환하는 함수로, 가드레일 호출 한도(AdaptiveLimiter)의
+    동시 실행 수에 맞춰 작업을 꺼내므로 한도가 줄어도 대기 중인 작업의 우선순위가 유지된다.
+    """
+
+    def __init__(self, max_workers=16, capacity=None, clock=time.monotonic):
+        self.max_workers = max_workers
+        self.capacity = capacity
+        self.clock = clock
+
+        self.queues = [OrderedDict() for _ in (HIGH, NORMAL)]  # 우선순위별 {세션: 작업 대기열}
+        self.running = 0
+        self.submitted = [0, 0]
+        self.wait_time = [0.0, 0.0]
+        self.started = [0, 0]
+        self._condition = threading.Condition()
+        self._workers = []
+
+    def submit(self, func, *args, priority=NORMAL, session=None):
+        """작업을 대기열에 넣고 Future 반환"""
+        future = Future()
+        with self._condition:
+            self.queues[priority].setdefault(session, deque()).append((future, func, args, self.clock()))
+            self.submitted[priority] += 1
+            self._start_workers()
+            self._condition.notify()
+        return future
+
+    def stats(self):
+        """우선순위별 대기 작업 수, 제출 수, 평균 대기 시간 반환"""
+        with self._condition:
+            return {
+                "running": self.running,
+                "queued": [sum(len(queue) for queue in queues.values()) for queues in self.queues],
+                "submitted": list(self.submitted),
+                "average_wait": [
+                    self.wait_time[priority] / self.started[priority] if self.started[priority] else 0.0
+                    for priority in (HIGH, NORMAL)
+                ]
+            }
+
+    def _start_workers(self):
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(target=self._run, name=f"guardrail-{len(self._workers)}", daemon=True)
+            self._workers.append(worker)
+            worker.start()
+
+    def _limit(self):
+        limit = self.max_workers
+        if self.capacity is not None:
+            limit = min(limit, max(1, self.capacity()))
+        return limit
+
+    def _next(self):
+        """실행할 다음 작업 (없거나 동시 실행 한도에 도달했으면 None)"""
+        if self.running >= self._limit():
+            return None
+        for priority, queues in enumerate(self.queues):
+            if not queues:
+                continue
+            session, queue = next(iter(queues.items()))
+            item = queue.popleft()
+            if queue:
+                # 같은 세션의 다음 작업은 다른 세션 뒤로
+                queues.move_to_end(session)
+            else:
+                del queues[session]
+            self.wait_time[priority] += self.clock() - item[3]
+            self.started[priority] += 1
+            return item
+        return None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                item = self._next()
+                while item is None:
+                    # 작업이 있는데 한도에 걸린 경우 한도는 외부에서 바뀌므로 주기적으로 다시 확인
+                    self._condition.wait(0.05 if any(self.queues) else None)
+                    item = self._next()
+                self.running += 1
+
+            future, func, args, _ = item
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(func(*args))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                with self._condition:
+                    self.running -= 1
+                    self._condition.notify()
+
+
+# 모든 관리자가 공유하는 디스패처 (가드레일 호출 한도의 동시 실행 수에 맞춰 실행)
+dispatcher = GuardrailDispatcher(capacity=lambda: int(limiter.concurrency))
@@ -1,46 +1,78 @@
+from buffer_manager.buffer_controller import BufferSizeController
+from buffer_manager.dispatcher import HIGH, NORMAL
 from buffer_manager.pre_guardrail_manager import PreGuardrailManager
-import math
 
 
 class DynamicGuardrailManager(PreGuardrailManager):
-    """첫 버퍼와 이후 버퍼 크기를 다르게 설정하여 처리하는 관리자"""
+    """첫 버퍼와 이후 버퍼 크기를 다르게 설정하여 처리하는 관리자
+
+    첫 버퍼는 initial_buffer_size 로 자르고, 이후에는 토큰 도착 속도와 가드레일 지연을 측정해
+    표시가 멈추지 않는 범위에서 가장 큰 버퍼(second_buffer_size ~ subsequent_buffer_size)를 고른다.
+    측정값이 아직 없거나 adaptive=False 이면 두 번째 버퍼는 second_buffer_size, 이후는 subsequent_buffer_size 를 쓴다.
+    rate_profile(buffer_controller.get_profile) 을 주면 측정값을 같은 모델의 다음 응답에서 이어서 사용한다.
+    """
 
     def __init__(self, placeholder, initial_buffer_size, second_buffer_size, subsequent_buffer_size, guardrail_config,
-                 debug_mode):
+                 debug_mode, pipelined=False, max_pending=2, playout_cps=300, playout_max_lag=2.0, segmenter=None,
+                 adaptive=True, rate_profile=None):
         """초기 설정 및 상태 초기화"""
-        super().__init__(placeholder, subsequent_buffer_size, guardrail_config, debug_mode)
+        super().__init__(placeholder, subsequent_buffer_size, guardrail_config, debug_mode, pipelined, max_pending,
+                         playout_cps, playout_max_lag, segmenter)
         self.first_buffer_size = initial_buffer_size
         self.second_buffer_size = second_buffer_size
         self.subsequent_buffer_size = subsequent_buffer_size
         self.buffer_stage = 0  # 0: first, 1: second, 2: subsequent
         self.is_first_chunk = True
+        self.controller = BufferSizeController(second_buffer_size, subsequent_buffer_size, playout_cps,
+                                               rate_profile) if adaptive else None
 
     def _handle_content(self, new_text):
         """새로운 텍스트를 버퍼에 추가하고 동적 크기로 처리"""
         self.buffer_text += new_text
-
-        if self.buffer_stage == 1:
-            chunk_size = max(1, int(len(new_text) / (self.second_buffer_size / self.first_buffer_size)))
-        elif self.buffer_stage == 2:
-            chunk_size = max(1, int(len(new_text) / (self.subsequent_buffer_size / self.second_buffer_size)))
-        else:
-            chunk_size = len(new_text)
-
-        self._stream_current_content(chunk_size)
+        if self.controller is not None:
+            self.controller.observe_text(len(new_text))
+        self._apply_ready_results()
+        if self.stopped:
+            return True
 
         current_buffer_size = self._get_current_buffer_size()
 
-        if len(self.buffer_text) > current_buffer_size:
-            self._process_buffer()
+        if len(self.buffer_text) >= current_buffer_size and self._process_buffer(current_buffer_size):
+            if self.controller is not None:
+                self.controller.record(current_buffer_size)
             self.buffer_stage = min(2, self.buffer_stage + 1)
             if self.buffer_stage == 2:
                 self.is_first_chunk = False
-        return False
+        return self.stopped
+
+    def _priority(self, final=False):
+        """첫 번째·두 번째 버퍼와 스트림 종료 시 남은 버퍼를 먼저 검사"""
+        return HIGH if final or self.buffer_stage < 2 else NORMAL
+
+    def _observe_check(self, text, wall_time, processing_latency, status, source=None):
+        """호출 지연을 메트릭과 컨트롤러에 기록 (캐시·로컬 결과는 지연을 낮게 잡지 않도록 컨트롤러에서 제외)"""
+        super()._observe_check(text, wall_time, processing_latency, status, source)
+        if self.controller is not None and source is None:
+            self.controller.observe_latency(wall_time, processing_latency)
+
+    def _finalize(self):
+        super()._finalize()
+        if self.controller is not None:
+            self.controller.finish()
 
     def _get_current_buffer_size(self):
+        if self.buffer_stage > 0 and self.controller is not None:
+            # 표시 대기 중인 글자와 검사 중인 글자가 다 표시되기 전에 다음 검사가 끝나야 함
+            queued_chars = self.playout.backlog
+            if self.pipeline is not None:
+                queued_chars += self.pipeline.pending_chars()
+            size = self.controller.next_size(len(self.buffer_text), queued_chars)
+            if size is not None:
+                return size
+
         if self.buffer_stage == 0:
             return self.first_buffer_size
         elif self.buffer_stage == 1:
             return self.second_buffer_size
         else:
-            return self.subsequent_buffer_size
\ No newline at end of file
+            return self.subsequent_buffer_size
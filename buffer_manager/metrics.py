@@ -0,0 +1,261 @@
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StreamMetrics:
+    """스트림 하나(세션)의 단계별 지연과 처리량 기록
+
+    시간은 messageStart 이벤트를 기준(0초)으로 기록한다.
+    """
+
+    def __init__(self, manager, clock=time.monotonic):
+        self.manager = manager
+        self.clock = clock
+
+        self.started = None
+        self.first_token = None
+        self.last_token = None
+        self.first_output = None
+        self.last_output = None
+        self.input_chars = 0
+        self.output_chars = 0
+        self.checks = []  # {"chars", "wall_time", "processing_latency", "status", "source"}
+        self._lock = threading.Lock()
+
+    def start(self):
+        """messageStart 수신"""
+        self.started = self.clock()
+
+    def token(self, count):
+        """모델 델타 수신"""
+        now = self.clock()
+        if self.first_token is None:
+            self.first_token = now
+        self.last_token = now
+        self.input_chars += count
+
+    def output(self, count):
+        """승인된 텍스트 내보냄"""
+        now = self.clock()
+        if self.first_output is None:
+            self.first_output = now
+        self.last_output = now
+        self.output_chars += count
+
+    def check(self, chars, wall_time, processing_latency, status, source=None):
+        """가드레일 검사 한 번 (검사 스레드에서 호출될 수 있음, source 가 있으면 Bedrock 을 호출하지 않은 결과)"""
+        with self._lock:
+            self.checks.append({
+                "chars": chars,
+                "wall_time": wall_time,
+                "processing_latency": processing_latency,
+                "status": status,
+                "source": source
+            })
+
+    def summary(self, **extra):
+        """세션 요약 (extra 로 관리자가 가진 사용량·생성량 등을 추가)"""
+        with self._lock:
+            checks = list(self.checks)
+        now = self.clock()
+        # 캐시·로컬 결과는 호출 지연 합계에서 제외
+        calls = [check for check in checks if check["source"] is None]
+        processing = [check["processing_latency"] for check in calls if check["processing_latency"] is not None]
+        summary = {
+            "manager": self.manager,
+            "time_to_first_token": self._since_start(self.first_token),
+            "time_to_first_output": self._since_start(self.first_output),
+            "duration": self._since_start(now),
+            "input_chars": self.input_chars,
+            "output_chars": self.output_chars,
+            "input_cps": _rate(self.input_chars, self.first_token, self.last_token),
+            "output_cps": _rate(self.output_chars, self.first_output, self.last_output),
+            "guardrail_checks": checks,
+            "guardrail_wall_time": sum(check["wall_time"] for check in calls),
+            "guardrail_processing_latency": sum(processing) if processing else None
+        }
+        summary.update(extra)
+        return summary
+
+    def _since_start(self, moment):
+        if moment is None or self.started is None:
+            return None
+        return moment - self.started
+
+
+def _rate(count, first, last):
+    if first is None or last is None or last <= first:
+        return None
+    return count / (last - first)
+
+
+class Histogram:
+    """Prometheus 형식 누적 히스토그램"""
+
+    def __init__(self, buckets):
+        self.buckets = sorted(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+
+_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+_CPS_BUCKETS = (10, 25, 50, 100, 200, 400, 800, 1600)
+
+_COUNTERS = {
+    "sessions": ("guardrail_stream_sessions_total", "처리한 스트림 수"),
+    "blocked": ("guardrail_stream_blocked_total", "차단 결과가 나온 스트림 수"),
+    "stopped_early": ("guardrail_stream_stopped_early_total", "차단되어 생성 도중 닫은 스트림 수"),
+    "guardrail_calls": ("guardrail_calls_total", "가드레일 검사 요청 수"),
+    "text_units": ("guardrail_text_units_total", "가드레일 검사 텍스트 단위 수"),
+    "skipped_calls": ("guardrail_calls_skipped_total", "캐시·로컬 판정으로 Bedrock 을 호출하지 않은 검사 수"),
+    "input_chars": ("guardrail_stream_input_chars_total", "모델이 생성한 글자 수"),
+    "output_chars": ("guardrail_stream_output_chars_total", "승인되어 내보낸 글자 수"),
+    "input_tokens": ("guardrail_model_input_tokens_total", "모델 입력 토큰 수 (metadata usage)"),
+    "output_tokens": ("guardrail_model_output_tokens_total", "모델 출력 토큰 수 (metadata usage)"),
+}
+
+_HISTOGRAMS = {
+    "time_to_first_token": ("guardrail_stream_first_token_seconds", "messageStart 부터 첫 델타까지 시간", _LATENCY_BUCKETS),
+    "time_to_first_output": ("guardrail_stream_first_output_seconds", "messageStart 부터 첫 승인 텍스트까지 시간",
+                             _LATENCY_BUCKETS),
+    "check_wall_time": ("guardrail_check_wall_seconds", "버퍼별 가드레일 호출 시간", _LATENCY_BUCKETS),
+    "check_processing_latency": ("guardrail_check_processing_seconds",
+                                 "버퍼별 guardrailProcessingLatency", _LATENCY_BUCKETS),
+    "stall_time": ("guardrail_playout_stall_seconds", "스트림별 표시 공백 시간", _LATENCY_BUCKETS),
+    "model_latency": ("guardrail_model_latency_seconds", "metadata 의 모델 latencyMs", _LATENCY_BUCKETS),
+    "input_cps": ("guardrail_stream_input_cps", "초당 생성 글자 수", _CPS_BUCKETS),
+    "output_cps": ("guardrail_stream_output_cps", "초당 승인 글자 수", _CPS_BUCKETS),
+}
+
+
+class MetricsRegistry:
+    """세션 요약을 관리자별로 집계하고 Prometheus 텍스트로 내보내는 레지스트리
+
+    add_listener 로 등록한 콜백은 세션이 끝날 때마다 요약(dict)을 받는다.
+    """
+
+    def __init__(self):
+        self.counters = {}  # (이름, 관리자) → 값
+        self.histograms = {}  # (이름, 관리자) → Histogram
+        self.listeners = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        self.listeners.remove(callback)
+
+    def record(self, summary):
+        """세션 요약 반영 후 리스너 호출"""
+        manager = summary["manager"]
+        model_usage = summary.get("model_usage") or {}
+        model_latency = summary.get("model_latency_ms")
+        stall_time = summary.get("stall_time")
+        usage = summary.get("usage") or {}
+        generation = summary.get("generation") or {}
+
+        with self._lock:
+            self._add("sessions", manager, 1)
+            self._add("blocked", manager, 1 if summary.get("blocked") else 0)
+            self._add("stopped_early", manager, 1 if generation.get("stopped_early") else 0)
+            self._add("guardrail_calls", manager, usage.get("calls", 0))
+            self._add("text_units", manager, usage.get("text_units", 0))
+            self._add("skipped_calls", manager, usage.get("skipped_calls", 0))
+            self._add("input_chars", manager, summary["input_chars"])
+            self._add("output_chars", manager, summary["output_chars"])
+            self._add("input_tokens", manager, model_usage.get("inputTokens", 0))
+            self._add("output_tokens", manager, model_usage.get("outputTokens", 0))
+
+            for key in ("time_to_first_token", "time_to_first_output", "input_cps", "output_cps"):
+                self._observe(key, manager, summary.get(key))
+            for check in summary["guardrail_checks"]:
+                if check.get("source") is not None:
+                    continue
+                self._observe("check_wall_time", manager, check["wall_time"])
+                self._observe("check_processing_latency", manager, check["processing_latency"])
+            self._observe("stall_time", manager, stall_time)
+            self._observe("model_latency", manager, model_latency / 1000 if model_latency is not None else None)
+
+        for callback in list(self.listeners):
+            try:
+                callback(summary)
+            except Exception:
+                # 메트릭 전송 실패가 응답 처리에 영향을 주지 않도록 무시
+                continue
+
+    def to_prometheus(self):
+        """Prometheus text exposition format 문자열 반환"""
+        lines = []
+        with self._lock:
+            for key, (name, description) in _COUNTERS.items():
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} counter")
+                for (counter, manager), value in sorted(self.counters.items()):
+                    if counter == key:
+                        lines.append(f'{name}{{manager="{manager}"}} {value}')
+            for key, (name, description, _) in _HISTOGRAMS.items():
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} histogram")
+                for (histogram_key, manager), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+                    if histogram_key != key:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{manager="{manager}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_bucket{{manager="{manager}",le="+Inf"}} {histogram.count}')
+                    lines.append(f'{name}_sum{{manager="{manager}"}} {histogram.sum}')
+                    lines.append(f'{name}_count{{manager="{manager}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def _add(self, key, manager, value):
+        self.counters[(key, manager)] = self.counters.get((key, manager), 0) + value
+
+    def _observe(self, key, manager, value):
+        if value is None:
+            return
+        histogram = self.histograms.get((key, manager))
+        if histogram is None:
+            histogram = self.histograms[(key, manager)] = Histogram(_HISTOGRAMS[key][2])
+        histogram.observe(value)
+
+
+# 프로세스 전역 메트릭 레지스트리
+registry = MetricsRegistry()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = self.server.registry.to_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_prometheus(port, host="0.0.0.0", metrics_registry=None):
+    """레지스트리를 Prometheus 가 수집할 수 있도록 백그라운드 HTTP 서버로 노출하고 서버 반환"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.registry = metrics_registry if metrics_registry is not None else registry
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
@@ -0,0 +1,69 @@
+from collections import deque
+from concurrent.futures import wait
+from buffer_manager.dispatcher import NORMAL, dispatcher
+
+
+class GuardrailPipeline:
+    """가드레일 검사를 공유 디스패처에서 백그라운드로 실행하고 결과를 제출 순서대로 반환"""
+
+    def __init__(self, check, max_pending=2, session=None):
+        """check: 텍스트를 받아 가드레일 결과를 반환하는 함수, session: 디스패처의 공정성 단위"""
+        self.check = check
+        self.max_pending = max(1, max_pending)
+        self.session = session
+        self.pending = deque()
+
+    def __len__(self):
+        return len(self.pending)
+
+    def pending_chars(self):
+        """검사 중이거나 대기 중인 텍스트의 글자 수"""
+        return sum(len(text) for _, text, _ in self.pending)
+
+    def submit(self, text, context=None, priority=NORMAL):
+        """검사 요청 제출 (대기 중인 요청이 가득 차면 가장 오래된 요청 완료까지 대기)"""
+        if len(self.pending) >= self.max_pending:
+            wait([self.pending[0][0]])
+        future = dispatcher.submit(self.check, text, priority=priority, session=self.session)
+        self.pending.append((future, text, context))
+
+    def last_text(self):
+        """마지막으로 제출한 요청의 텍스트 (없으면 None)"""
+        return self.pending[-1][1] if self.pending else None
+
+    def last_context(self):
+        """마지막으로 제출한 요청의 context (없으면 None)"""
+        return self.pending[-1][2] if self.pending else None
+
+    def replace_last(self, text, context=None, priority=NORMAL):
+        """마지막 요청이 아직 시작되지 않았으면 취소하고 새 텍스트로 다시 제출 (성공하면 True)"""
+        if not self.pending or not self.pending[-1][0].cancel():
+            return False
+        self.pending.pop()
+        future = dispatcher.submit(self.check, text, priority=priority, session=self.session)
+        self.pending.append((future, text, context))
+        return True
+
+    def poll(self):
+        """앞에서부터 완료된 결과만 순서대로 반환 (차단하지 않음)"""
+        results = []
+        while self.pending and self.pending[0][0].done():
+            results.append(self._pop())
+        return results
+
+    def drain(self):
+        """남은 요청을 모두 기다려 순서대로 반환"""
+        results = []
+        while self.pending:
+            results.append(self._pop())
+        return results
+
+    def cancel(self):
+        """아직 시작되지 않은 요청 취소"""
+        while self.pending:
+            future, _, _ = self.pending.popleft()
+            future.cancel()
+
+    def _pop(self):
+        future, text, context = self.pending.popleft()
+        return text, context, future.result()
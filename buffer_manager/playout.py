@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import deque
+
+
+class PlayoutScheduler:
+    """승인된 텍스트를 별도 스레드에서 목표 속도(초당 글자 수)로 내보내는 스케줄러
+
+    스트림 읽기를 막지 않으며, 밀린 텍스트가 max_lag 초 분량을 넘으면 그 안에 따라잡도록 속도를 높이고,
+    finish() 이후에는 남은 텍스트를 drain_time 초 안에 모두 내보낸다.
+    """
+
+    def __init__(self, renderer=None, chars_per_second=300, max_lag=2.0, fps=30, drain_time=0.5,
+                 clock=time.monotonic):
+        self.renderer = renderer
+        self.chars_per_second = chars_per_second
+        self.max_lag = max_lag
+        self.interval = 1.0 / fps
+        self.drain_time = drain_time
+        self.clock = clock
+
+        self.segments = deque()  # [block, text, 표시한 글자 수]
+        self.backlog = 0
+        self.released = 0
+        self.stall_time = 0.0
+        self.first_release_time = None
+
+        self._finishing = False
+        self._drain_deadline = None
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def feed(self, block, text):
+        """블록에 표시할 승인된 텍스트 추가 (차단하지 않음)"""
+        if not text:
+            return
+        with self._condition:
+            self.segments.append([block, text, 0])
+            self.backlog += len(text)
+            self._condition.notify()
+        self._start()
+
+    def finish(self, timeout=None):
+        """남은 텍스트를 drain_time 안에 모두 내보내고 스레드 종료까지 대기"""
+        with self._condition:
+            self._finishing = True
+            self._drain_deadline = self.clock() + self.drain_time
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self):
+        """내보낸 글자 수, 남은 글자 수, 표시 공백(stall) 시간 반환"""
+        with self._condition:
+            return {
+                "released_chars": self.released,
+                "backlog_chars": self.backlog,
+                "stall_time": self.stall_time,
+                "first_release_time": self.first_release_time
+            }
+
+    def _start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="playout", daemon=True)
+        if self.renderer is not None:
+            self.renderer.attach_thread(self._thread)
+        self._thread.start()
+
+    def _run(self):
+        last = self.clock()
+        carry = 0.0
+        while True:
+            with self._condition:
+                if not self.segments:
+                    if self._finishing:
+                        return
+                    # 내보낼 텍스트가 없는 동안은 표시 공백으로 집계
+                    waited = self.clock()
+                    while not self.segments and not self._finishing:
+                        self._condition.wait()
+                    last = self.clock()
+                    self.stall_time += last - waited
+                    carry = 0.0
+                    continue
+
+                now = self.clock()
+                carry += self._rate(now) * (now - last)
+                last = now
+                count = int(carry)
+                carry -= count
+                writes = self._take(count)
+
+            for block, text, position, delta in writes:
+                append = getattr(block, 'append', None)
+                if append is not None:
+                    append(delta)
+                else:
+                    block.write(text[:position])
+
+            time.sleep(self.interval)
+
+    def _rate(self, now):
+        """밀린 양에 따라 조정된 현재 초당 글자 수"""
+        rate = self.chars_per_second
+        if self._finishing:
+            remaining = max(self._drain_deadline - now, self.interval)
+            return max(rate, self.backlog / remaining)
+        if self.backlog > rate * self.max_lag:
+            return self.backlog / self.max_lag
+        return rate
+
+    def _take(self, count):
+        """앞 세그먼트부터 count 글자를 내보낼 목록 반환"""
+        writes = []
+        while count > 0 and self.segments:
+            segment = self.segments[0]
+            block, text, position = segment
+            step = min(count, len(text) - position)
+            segment[2] = position + step
+            writes.append((block, text, position + step, text[position:position + step]))
+            count -= step
+            self.backlog -= step
+            self.released += step
+            if self.first_release_time is None:
+                self.first_release_time = self.clock()
+            if segment[2] >= len(text):
+                self.segments.popleft()
+        return writes
@@ -1,36 +1,161 @@
+from collections import deque
 from buffer_manager.base_manager import BaseManager
+from buffer_manager.pipeline import GuardrailPipeline
+from buffer_manager.render_scheduler import RenderScheduler
+from buffer_manager.segmenter import split_filtered
 
 
 class PostGuardrailManager(BaseManager):
-    """텍스트를 먼저 표시하고 후속으로 가드레일을 적용하는 관리자"""
+    """텍스트를 먼저 표시하고 후속으로 가드레일을 적용하는 관리자
+
+    검사 결과가 비식별화이면 이미 표시한 구간을 비식별화된 텍스트로 바꾸고,
+    차단이면 해당 구간을 차단 메시지로 바꾸고 이후 표시한 텍스트를 지운 뒤 스트림을 중단한다.
+    """
+
+    def __init__(self, placeholder, buffer_size, guardrail_config, debug_mode, render_fps=25, render_chars=200,
+                 segmenter=None, pipelined=True, max_pending=4):
+        """render_fps / render_chars: 델타를 모아 화면에 반영하는 주기(초당 횟수)와 글자 수 기준
+
+        pipelined=True 이면 검사를 백그라운드로 실행하여 검사 중에도 표시를 계속하고, 결과는 순서대로 반영
+        """
+        super().__init__(placeholder, buffer_size, guardrail_config, debug_mode, segmenter)
+        self.render_scheduler = RenderScheduler(render_fps, render_chars, renderer=self.renderer)
+        self.pipeline = GuardrailPipeline(self._apply_guardrail, max_pending, self) if pipelined else None
+        self.unchecked_blocks = deque()  # 표시했지만 검사 결과가 아직 없는 블록
+        self.last_shown = None  # 마지막으로 검사를 마친 (블록, 표시 텍스트, 표시 텍스트 중 꼬리 길이)
+
     def _handle_content(self, new_text):
         """새로운 텍스트를 버퍼에 추가하고 즉시 표시"""
         self._print_start_time()
         self._ensure_placeholder()
         self.buffer_text += new_text
-        self._display_content(self.buffer_text)
+        self.render_scheduler.append(new_text)
 
-        if len(self.buffer_text) > self.buffer_size:
+        if self._apply_ready_results():
+            return True
+        if len(self.buffer_text) >= self.buffer_size:
             return self._process_buffer()
         return False
 
     def _handle_stream_end(self):
         """스트림 종료 시 남은 버퍼 처리"""
-        if self.buffer_text:
-            self._process_buffer()
+        if (self.buffer_text or self.overlap_text) and self._process_buffer(final=True):
+            return
+        if self.pipeline is not None:
+            for check_text, context, result in self.pipeline.drain():
+                if self._apply_result(*result, check_text, *context):
+                    return
+
+    def _handle_local_block(self, violations):
+        """이미 표시된 미검사 버퍼를 차단 메시지로 교체"""
+        if self.pipeline is not None:
+            # 앞서 표시한 구간의 검사 결과를 먼저 반영
+            for check_text, context, result in self.pipeline.drain():
+                if self._apply_result(*result, check_text, *context):
+                    return
+        self._ensure_placeholder()
+        self.render_scheduler.flush()
+        self.content_placeholder.write(self.guardrail_config["local_guardrail"].blocked_message)
+        super()._handle_local_block(violations)
 
-    def _display_content(self, text):
-        """UI에 텍스트 표시"""
-        if text:
-            self.content_placeholder.write(text)
+    def _finalize(self):
+        """중단된 경우 대기 중인 검사와 예약된 화면 반영 취소"""
+        self.render_scheduler.cancel()
+        if self.pipeline is not None:
+            self.pipeline.cancel()
 
-    def _process_buffer(self):
-        """버퍼 내용을 검사하고 결과 처리"""
-        if not self.buffer_text:
+    def _ensure_placeholder(self):
+        """UI 표시를 위한 플레이스홀더 생성 및 렌더 스케줄러 연결"""
+        super()._ensure_placeholder()
+        self.render_scheduler.bind(self.content_placeholder)
+
+    def _process_buffer(self, final=False):
+        """버퍼에서 경계에 맞춰 자른 구간을 검사하고 결과 처리 (차단되면 True 반환)"""
+        cut = self._cut_buffer(self.buffer_size, final)
+        if cut is None:
+            return False
+        check_text, overlap_length, tail = cut
+
+        self.render_scheduler.flush()
+        block = self._split_block(check_text[overlap_length:])
+        self.unchecked_blocks.append(block)
+        context = (block, len(check_text) - overlap_length, tail)
+
+        if self.pipeline is not None:
+            # 검사는 백그라운드로 넘기고 표시는 계속
+            self.pipeline.submit(check_text, context, self._priority(final))
             return False
 
-        status, violations, filtered_text, response = self._apply_guardrail()
-        self.full_text += filtered_text
+        status, violations, filtered_text, response = self._check(check_text, self._priority(final))
+        return self._apply_result(status, violations, filtered_text, response, check_text, *context)
+
+    def _split_block(self, own_text):
+        """검사 구간은 현재 블록에 남기고 잘리고 남은 텍스트는 새 블록으로 옮긴 뒤 검사 구간의 블록 반환"""
+        self._ensure_placeholder()
+        block = self.content_placeholder
+        remainder = self.buffer_text.getvalue()
+        self.content_placeholder = None
+        if remainder:
+            block.write(own_text)
+            self._ensure_placeholder()
+            self.render_scheduler.append(remainder)
+            self.render_scheduler.flush()
+        return block
+
+    def _apply_ready_results(self):
+        """완료된 백그라운드 검사 결과를 순서대로 반영하고 차단 여부 반환"""
+        if self.pipeline is None:
+            return False
+        for check_text, context, result in self.pipeline.poll():
+            if self._apply_result(*result, check_text, *context):
+                return True
+        return False
+
+    def _apply_result(self, status, violations, filtered_text, response, check_text, block, own_length, tail):
+        """검사 결과를 기록하고 표시한 구간을 결과에 맞게 교체 (차단되면 True 반환)"""
+        self.unchecked_blocks.popleft()
+        text, start, split = self._release_text(status, check_text, filtered_text, len(check_text) - own_length, tail)
+        self.full_text += text
+        self._emit(text, status, violations, response)
         self._show_results(status, violations, response)
+
+        if status == "blocked":
+            self._retract_blocked(block, filtered_text)
+            return True
+        if status == "anonymized":
+            self._retract_anonymized(block, check_text, filtered_text, own_length, start, split)
+        else:
+            self.last_shown = (block, check_text[len(check_text) - own_length:], len(filtered_text) - split)
+        return False
+
+    def _retract_anonymized(self, block, check_text, filtered_text, own_length, start, tail_split):
+        """표시한 원문을 비식별화된 텍스트로 교체 (이전 구간의 꼬리가 바뀐 경우 이전 블록도 교체)
+
+        start / tail_split 은 _release_text 가 내보낸 구간의 filtered_text 기준 시작과 끝이다.
+        """
+        split = max(start, split_filtered(check_text, filtered_text, len(check_text) - own_length))
+        display = filtered_text[split:]
+        block.write(display)
+
+        filtered_prefix = filtered_text[start:split]
+        # 직전 꼬리를 다시 검사하지 않았으면 이전 블록은 직전 검사 결과 그대로 둠
+        if self.last_shown is not None and own_length < len(check_text):
+            previous_block, previous_display, previous_tail = self.last_shown
+            head = previous_display[:len(previous_display) - previous_tail]
+            if previous_display[len(head):] != filtered_prefix:
+                previous_block.write(head + filtered_prefix)
+
+        self.last_shown = (block, display, len(filtered_text) - max(split, tail_split))
+
+    def _retract_blocked(self, block, blocked_message):
+        """차단된 구간을 차단 메시지로 바꾸고 이후에 표시한 미검사 텍스트를 지운 뒤 남은 검사 취소"""
+        self.render_scheduler.flush()
+        block.write(blocked_message)
+        for later_block in self.unchecked_blocks:
+            later_block.write("")
+        self.unchecked_blocks.clear()
+        if self.content_placeholder is not None:
+            self.content_placeholder.write("")
+        if self.pipeline is not None:
+            self.pipeline.cancel()
         self._reset_buffer()
-        return status == "blocked"
@@ -1,63 +1,129 @@
-import time
+from guardrails.bedrock import text_units
 from buffer_manager.base_manager import BaseManager
+from buffer_manager.pipeline import GuardrailPipeline
+from buffer_manager.playout import PlayoutScheduler
 
 
 class PreGuardrailManager(BaseManager):
     """가드레일 검사 후 승인된 텍스트만 점진적으로 표시하는 관리자"""
 
-    def __init__(self, placeholder, buffer_size, guardrail_config, debug_mode):
-        super().__init__(placeholder, buffer_size, guardrail_config, debug_mode)
-        self.processed_text = ""
-        self.current_start_position = 0
-        self.current_end_position = 0
+    def __init__(self, placeholder, buffer_size, guardrail_config, debug_mode, pipelined=False, max_pending=2,
+                 playout_cps=300, playout_max_lag=2.0, segmenter=None):
+        """pipelined=True 이면 버퍼 검사를 백그라운드로 실행하고 결과는 순서대로 반영
+
+        승인된 텍스트는 playout_cps(초당 글자 수) 속도로 표시하며, playout_max_lag 초 분량 이상 밀리면 속도를 높인다.
+        """
+        super().__init__(placeholder, buffer_size, guardrail_config, debug_mode, segmenter)
+        self.pipeline = GuardrailPipeline(self._apply_guardrail, max_pending, self) if pipelined else None
+        self.playout = PlayoutScheduler(self.renderer, playout_cps, playout_max_lag)
 
     def _handle_content(self, new_text):
-        """새로운 텍스트를 버퍼에 추가하고 청크 단위로 처리"""
+        """새로운 텍스트를 버퍼에 추가하고 버퍼가 차면 검사"""
         self.buffer_text += new_text
-        self._stream_current_content(len(new_text))
+        self._apply_ready_results()
 
-        if len(self.buffer_text) > self.buffer_size:
-            self._process_buffer()
-        return False
+        if not self.stopped and len(self.buffer_text) >= self.buffer_size:
+            self._process_buffer(self.buffer_size)
+        return self.stopped
 
     def _handle_stream_end(self):
-        """처리된 텍스트를 청크 단위로 표시"""
-        if self.buffer_text:
-            self._process_buffer()
-        self._stream_remaining_content()
-
-    def _stream_current_content(self, chunk_size=3):
-        """처리된 텍스트를 청크 단위로 순차적으로 표시"""
-        if not self.processed_text or self.current_end_position >= len(self.processed_text):
-            return
+        """남은 버퍼를 검사하고 승인된 텍스트를 모두 표시"""
+        if (self.buffer_text or self.overlap_text) and not self._merge_trailing():
+            self._process_buffer(0, final=True)
+        if self.pipeline is not None:
+            for check_text, context, result in self.pipeline.drain():
+                self._apply_pipelined_result(*result, check_text, *context)
+                if self.stopped:
+                    break
+        self.playout.finish()
 
-        # print(f"{len(self.buffer_text)}_{chunk_size}")
-        self._ensure_placeholder()
-        end_pos = min(self.current_end_position + chunk_size, len(self.processed_text))
-        chunk = self.processed_text[self.current_start_position:end_pos]
-        self.content_placeholder.write(chunk)
-        self.current_end_position = end_pos
+    def _handle_local_block(self, violations):
+        """앞서 제출한 검사 결과를 반영하고 승인된 텍스트까지 표시한 뒤 차단 메시지 표시"""
+        if self.pipeline is not None:
+            # 금지어 앞 구간의 검사 결과를 먼저 반영
+            for check_text, context, result in self.pipeline.drain():
+                self._apply_pipelined_result(*result, check_text, *context)
+                if self.stopped:
+                    return
+        self.playout.finish()
+        self.renderer.new_block().write(self.guardrail_config["local_guardrail"].blocked_message)
+        super()._handle_local_block(violations)
 
-        time.sleep(0.01)
+    def _finalize(self):
+        """오류 등으로 중단되어도 재생 스레드가 남지 않도록 종료"""
+        if self.pipeline is not None:
+            self.pipeline.cancel()
+        self.playout.finish(timeout=0)
 
-    def _stream_remaining_content(self):
-        """남은 처리된 텍스트 모두 표시"""
-        while self.current_end_position < len(self.processed_text):
-            self._stream_current_content()
+    def _stall_time(self):
+        return self.playout.stats()["stall_time"]
 
-    def _process_buffer(self):
-        """버퍼 내용을 검사하고 승인된 텍스트만 처리"""
-        if not self.buffer_text:
-            return
+    def _merge_trailing(self):
+        """남은 버퍼를 아직 시작되지 않은 마지막 검사 요청에 합침 (텍스트 단위 수가 늘지 않을 때만)"""
+        last_text = self.pipeline.last_text() if self.pipeline is not None else None
+        remainder = self.buffer_text.getvalue()
+        if last_text is None or not remainder:
+            return False
+
+        merged = last_text + remainder
+        if text_units(merged) > text_units(last_text):
+            return False
+        overlap_length, _ = self.pipeline.last_context()
+        if not self.pipeline.replace_last(merged, (overlap_length, ""), self._priority(final=True)):
+            return False
+        self.buffer_text.clear()
+        self.overlap_text = ""
+        return True
+
+    def _process_buffer(self, size, final=False):
+        """버퍼에서 경계에 맞춰 자른 구간을 검사하고 승인된 텍스트만 처리 (잘랐으면 True 반환)"""
+        cut = self._cut_buffer(size, final)
+        if cut is None:
+            return False
+        check_text, overlap_length, tail = cut
+
+        if self.pipeline is not None:
+            # 검사는 백그라운드로 넘기고 다음 버퍼를 계속 채움
+            self.pipeline.submit(check_text, (overlap_length, tail), self._priority(final))
+            return True
 
         self._print_start_time()
-        self._stream_remaining_content()
-        status, violations, filtered_text, response = self._apply_guardrail()
+        status, violations, filtered_text, response = self._check(check_text, self._priority(final))
+        self._apply_result(status, violations, filtered_text, response, check_text, overlap_length, tail)
+        return True
 
-        self.full_text += filtered_text
-        if status != "blocked":
-            self.processed_text += filtered_text
-            self.current_start_position = self.current_end_position
+    def _apply_ready_results(self):
+        """완료된 백그라운드 검사 결과를 순서대로 반영"""
+        if self.pipeline is None:
+            return
+        for check_text, context, result in self.pipeline.poll():
+            self._apply_pipelined_result(*result, check_text, *context)
+            if self.stopped:
+                return
+
+    def _apply_pipelined_result(self, status, violations, filtered_text, response, check_text, overlap_length, tail):
+        """백그라운드 검사 결과 반영"""
+        self._print_start_time()
+        self._apply_result(status, violations, filtered_text, response, check_text, overlap_length, tail)
 
+    def _apply_result(self, status, violations, filtered_text, response, check_text="", overlap_length=0, tail=""):
+        """가드레일 결과에 따라 승인된 텍스트를 표시 대기열에 추가"""
+        text, _, _ = self._release_text(status, check_text, filtered_text, overlap_length, tail)
+        self.full_text += text
+        self._emit(text, status, violations, response)
         self._show_results(status, violations, response)
-        self._reset_buffer()
+        if status == "blocked":
+            self._stop_blocked(text)
+            return
+        # 블록은 결과 표시 순서대로 만들고 글자는 재생 스레드가 채움
+        self.playout.feed(self.renderer.new_block(), text)
+
+    def _stop_blocked(self, blocked_message):
+        """차단되면 남은 검사를 취소하고 이미 승인된 텍스트까지만 표시한 뒤 차단 메시지 표시"""
+        self.stopped = True
+        if self.pipeline is not None:
+            self.pipeline.cancel()
+        self.playout.finish()
+        self.renderer.new_block().write(blocked_message)
+        self.buffer_text.clear()
+        self.overlap_text = ""
@@ -0,0 +1,89 @@
+import threading
+import time
+from buffer_manager.text_buffer import TextBuffer
+
+
+class RenderScheduler:
+    """델타를 모아 두었다가 정해진 프레임 속도 또는 글자 수마다 블록에 반영하는 스케줄러
+
+    블록이 append(text) 를 지원하면 새로 추가된 텍스트만 보내고,
+    그렇지 않으면(Streamlit 의 st.empty 등) 블록 전체 내용을 write(text) 로 교체한다.
+    다음 델타가 늦게 와도 쌓인 텍스트가 한 프레임 이상 머물지 않도록 타이머 스레드로도 반영한다.
+    """
+
+    def __init__(self, fps=25, max_pending_chars=200, clock=time.monotonic, renderer=None):
+        """fps 가 0 이면 델타마다 즉시 반영, renderer 는 타이머 스레드가 블록에 쓸 수 있도록 준비하는 데 사용"""
+        self.interval = 1.0 / fps if fps else 0.0
+        self.max_pending_chars = max_pending_chars
+        self.clock = clock
+        self.renderer = renderer
+
+        self.block = None
+        self.text = TextBuffer()
+        self.pending = []
+        self.pending_chars = 0
+        self.last_flush = 0.0
+        self.flushes = 0
+
+        self._lock = threading.RLock()
+        self._timer = None
+
+    def bind(self, block):
+        """새 블록으로 출력 대상 변경 (이전 블록의 남은 내용은 먼저 반영)"""
+        with self._lock:
+            if block is self.block:
+                return
+            self.flush()
+            self.block = block
+            self.text.clear()
+
+    def append(self, text):
+        """텍스트를 추가하고 프레임 간격이나 글자 수 기준을 넘으면 반영, 아니면 다음 프레임 시각에 반영하도록 예약"""
+        if not text:
+            return
+        with self._lock:
+            self.pending.append(text)
+            self.pending_chars += len(text)
+
+            now = self.clock()
+            if (now - self.last_flush >= self.interval
+                    or self.max_pending_chars and self.pending_chars >= self.max_pending_chars):
+                self.flush(now)
+            elif self._timer is None:
+                self._schedule(self.last_flush + self.interval - now)
+
+    def cancel(self):
+        """예약된 반영 취소 (쌓인 텍스트는 반영하지 않음)"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def flush(self, now=None):
+        """쌓인 텍스트를 즉시 블록에 반영"""
+        with self._lock:
+            self.cancel()
+            if not self.pending or self.block is None:
+                return
+            self._write(now)
+
+    def _schedule(self, delay):
+        self._timer = threading.Timer(max(0.0, delay), self.flush)
+        self._timer.daemon = True
+        if self.renderer is not None:
+            self.renderer.attach_thread(self._timer)
+        self._timer.start()
+
+    def _write(self, now):
+        delta = "".join(self.pending)
+        self.pending = []
+        self.pending_chars = 0
+        self.text += delta
+
+        append = getattr(self.block, 'append', None)
+        if append is not None:
+            append(delta)
+        else:
+            self.block.write(self.text.getvalue())
+        self.last_flush = self.clock() if now is None else now
+        self.flushes += 1
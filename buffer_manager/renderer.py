@@ -0,0 +1,88 @@
+class NullBlock:
+    """아무것도 표시하지 않는 텍스트 블록"""
+
+    def write(self, text):
+        pass
+
+
+class Renderer:
+    """버퍼 관리자의 화면 출력 인터페이스 (기본 구현은 아무것도 표시하지 않음)
+
+    API 서버 등 UI 가 없는 환경에서는 이 클래스를 그대로 사용하고,
+    관리자가 내보내는 세그먼트(stream())로 결과를 받는다.
+    """
+
+    def start(self):
+        """응답 시작 표시"""
+
+    def end(self):
+        """응답 종료 표시"""
+
+    def info(self, message):
+        """안내 메시지 표시"""
+
+    def error(self, message):
+        """오류 메시지 표시"""
+
+    def new_block(self):
+        """텍스트를 이어서 쓸 새 블록 생성 (write(text) 로 블록 내용을 교체)"""
+        return NullBlock()
+
+    def show_results(self, status, violations, response):
+        """가드레일 검사 결과 표시"""
+
+    def show_metrics(self, summary):
+        """스트림 처리 단계별 지연·처리량 요약 표시"""
+
+    def attach_thread(self, thread):
+        """백그라운드 스레드에서 블록에 쓸 수 있도록 준비"""
+
+
+class StreamlitRenderer(Renderer):
+    """Streamlit 컨테이너에 출력하는 렌더러"""
+
+    def __init__(self, placeholder):
+        self.placeholder = placeholder
+
+    def start(self):
+        self.placeholder.divider()
+
+    def end(self):
+        self.placeholder.divider()
+
+    def info(self, message):
+        self.placeholder.info(message)
+
+    def error(self, message):
+        import streamlit as st
+        st.error(message)
+
+    def new_block(self):
+        return self.placeholder.empty()
+
+    def attach_thread(self, thread):
+        from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+        add_script_run_ctx(thread, get_script_run_ctx())
+
+    def show_metrics(self, summary):
+        import streamlit as st
+
+        with self.placeholder.expander("처리 지연 · 처리량"):
+            st.json(summary)
+
+    def show_results(self, status, violations, response):
+        import streamlit as st
+        import pandas as pd
+
+        status_messages = {
+            "blocked": ("가드레일 검사 결과 : 🚫 Blocked", "error"),
+            "anonymized": ("가드레일 검사 결과 : ⚠️ Anonymized", "warning"),
+            "passed": ("가드레일 검사 결과 : ✅ Passed", "success")
+        }
+
+        message, method = status_messages.get(status)
+        getattr(self.placeholder, method)(message)
+
+        with self.placeholder.expander("가드레일 검사 Trace"):
+            st.dataframe(pd.DataFrame(violations), hide_index=True, use_container_width=True)
+            st.json(response)
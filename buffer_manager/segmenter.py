@@ -0,0 +1,147 @@
+import difflib
+import re
+
+
+# 문장 끝: 마침표류(한·중·일 문장부호 포함) 뒤 닫는 따옴표·괄호가 오고 공백이 이어지는 곳, 또는 줄바꿈
+_SENTENCE_END = re.compile(r'[.!?…。！？]+["\'”’)\]」』]*\s+|\n+')
+# 어절 경계: 한국어는 어절(조사·어미 포함)이 공백으로 나뉘므로 공백 뒤에서 자르면 어절이 쪼개지지 않음
+_WORD_END = re.compile(r'\s+')
+# 공백이 없는 긴 토큰(URL, 중국어·일본어 등) 안에서라도 자를 수 있는 구두점
+_SOFT_END = re.compile(r'[,;:、，；：]\s*')
+# 검사 결과 정렬 단위: 글자 단위로 맞추면 치환 문자열({NAME} 등)의 글자가 원문 글자와 우연히 맞춰짐
+_TOKEN = re.compile(r'\w+|\s+|[^\w\s]')
+
+
+class Segmenter:
+    """버퍼를 목표 크기 근처의 문장·어절 경계에서 자르는 분할기
+
+    목표 크기의 ±tolerance 범위에서 문장 경계 > 어절(공백) 경계 > 구두점 순으로 자를 위치를 고르고,
+    범위 안에 경계가 없으면 범위 끝에서 자른다. 목표 크기가 0 이하이면 지금까지 받은 텍스트의 마지막 경계에서 자른다.
+    overlap 이 0 보다 크면 문장 경계가 아닌 곳에서 자를 때 마지막 어절들(약 overlap 글자)을
+    다음 검사에 다시 포함하도록 꼬리로 남긴다. 문장 경계에서 잘랐거나 마지막 구간이면 꼬리를 남기지 않는다.
+    """
+
+    def __init__(self, tolerance=0.2, overlap=0):
+        self.tolerance = tolerance
+        self.overlap = overlap
+
+    def split(self, text, size, final=False, limit=None):
+        """(자를 위치, 꼬리 시작 위치) 반환, 경계를 찾기 위해 더 기다려야 하면 None
+
+        limit 을 주면 자를 위치가 limit 을 넘지 않는다 (텍스트 단위 경계에 맞출 때 사용).
+        """
+        if final:
+            return len(text), len(text)
+        if size <= 0:
+            return self._split_latest(text, limit)
+
+        high = size + int(size * self.tolerance)
+        if limit is not None:
+            high = max(1, min(high, limit))
+        low = max(1, min(size - int(size * self.tolerance), high))
+        if len(text) < min(size, high):
+            return None
+
+        cut = self._last_boundary(_SENTENCE_END, text, low, high)
+        if cut is not None:
+            return cut, cut
+        if len(text) < high:
+            # 범위 안에서 문장이 끝날 수 있으므로 범위 끝까지는 기다림
+            return None
+
+        cut = self._last_boundary(_WORD_END, text, low, high)
+        if cut is None:
+            cut = self._last_boundary(_SOFT_END, text, low, high)
+        if cut is None:
+            cut = high
+        return cut, self._tail_start(text, cut)
+
+    def _split_latest(self, text, limit):
+        """목표 크기가 없을 때(0 이하) 지금까지 받은 텍스트의 마지막 경계에서 자름 (경계가 없으면 None)"""
+        high = len(text) if limit is None else max(1, min(len(text), limit))
+        sentence = self._last_boundary(_SENTENCE_END, text, 1, high)
+        cut = self._last_boundary(_WORD_END, text, 1, high)
+        if cut is None:
+            cut = self._last_boundary(_SOFT_END, text, 1, high)
+        if cut is None and sentence is None:
+            if limit is None or len(text) < limit:
+                return None
+            cut = high
+        if sentence is not None and (cut is None or sentence >= cut):
+            return sentence, sentence
+        return cut, self._tail_start(text, cut)
+
+    @staticmethod
+    def _last_boundary(pattern, text, low, high):
+        """low 이상 high 이하인 마지막 경계(경계 문자 바로 뒤) 위치"""
+        cut = None
+        for match in pattern.finditer(text, max(0, low - 1), min(len(text), high + 1)):
+            end = match.end()
+            if end > high:
+                break
+            if end >= low:
+                cut = end
+        return cut
+
+    def _tail_start(self, text, cut):
+        """다음 검사에 다시 포함할 꼬리의 시작 위치 (어절 시작에 맞춤)"""
+        if self.overlap <= 0:
+            return cut
+        start = max(0, cut - self.overlap)
+        # 어절 중간에서 시작하지 않도록 앞쪽 공백까지 넓히되 overlap 의 두 배를 넘지 않음
+        limit = max(0, cut - 2 * self.overlap)
+        while start > limit and not text[start - 1].isspace():
+            start -= 1
+        return start
+
+
+def split_filtered(text, filtered_text, position):
+    """검사한 text 의 position 위치가 결과 filtered_text 에서 어디인지 반환
+
+    비식별화는 일부 구간을 치환만 하므로 바뀌지 않은 앞뒤 부분으로 먼저 찾고, 양쪽 모두 바뀐 경우에만 정렬한다.
+    치환된 구간에 걸친 위치는 그 구간의 시작으로 옮긴다.
+    """
+    if text == filtered_text:
+        return position
+    if filtered_text.endswith(text[position:]):
+        return len(filtered_text) - (len(text) - position)
+    if filtered_text.startswith(text[:position]):
+        return position
+
+    for tag, i1, i2, j1, j2 in _filtered_opcodes(text, filtered_text):
+        if position < i2 or position == i2 == len(text):
+            return j1 + (position - i1) if tag == 'equal' else j1
+    return len(filtered_text)
+
+
+def align_filtered(text, filtered_text, position):
+    """검사한 text 의 position 위치를 치환된 구간 밖으로 옮겨 (text 위치, filtered_text 위치) 반환
+
+    split_filtered 와 달리 치환된 구간에 걸친 위치는 그 구간의 끝으로 옮겨, 두 위치 앞뒤가 서로 같은 원문을 가리키게 한다.
+    """
+    if text == filtered_text:
+        return position, position
+    if filtered_text.endswith(text[position:]):
+        return position, len(filtered_text) - (len(text) - position)
+
+    for tag, i1, i2, j1, j2 in _filtered_opcodes(text, filtered_text):
+        if position < i2 or position == i2 == len(text):
+            if tag == 'equal':
+                return position, j1 + (position - i1)
+            return (i1, j1) if position == i1 else (i2, j2)
+    return len(text), len(filtered_text)
+
+
+def _filtered_opcodes(text, filtered_text):
+    """text 와 filtered_text 를 단어·공백·구두점 토큰 단위로 정렬한 글자 위치 기준 opcode"""
+    spans = [m.span() for m in _TOKEN.finditer(text)]
+    filtered_spans = [m.span() for m in _TOKEN.finditer(filtered_text)]
+    matcher = difflib.SequenceMatcher(None, [text[i:j] for i, j in spans],
+                                      [filtered_text[i:j] for i, j in filtered_spans], autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        yield (tag, _offset(spans, i1, len(text)), _offset(spans, i2, len(text)),
+               _offset(filtered_spans, j1, len(filtered_text)), _offset(filtered_spans, j2, len(filtered_text)))
+
+
+def _offset(spans, index, length):
+    return spans[index][0] if index < len(spans) else length
@@ -0,0 +1,57 @@
+class TextBuffer:
+    """청크 리스트 기반 텍스트 버퍼
+
+    append 는 O(1), 길이는 캐시되며, 전체 문자열은 필요할 때 한 번만 만들어 캐시한다.
+    """
+
+    __slots__ = ("_chunks", "_length", "_value")
+
+    def __init__(self, text=""):
+        self._chunks = []
+        self._length = 0
+        self._value = ""
+        if text:
+            self.append(text)
+
+    def append(self, text):
+        """텍스트를 뒤에 추가"""
+        if not text:
+            return
+        text = str(text)
+        self._chunks.append(text)
+        self._length += len(text)
+        self._value = None
+
+    def __iadd__(self, text):
+        self.append(text)
+        return self
+
+    def __len__(self):
+        return self._length
+
+    def __bool__(self):
+        return self._length > 0
+
+    def __str__(self):
+        return self.getvalue()
+
+    def __eq__(self, other):
+        if isinstance(other, TextBuffer):
+            other = other.getvalue()
+        return self.getvalue() == other
+
+    def __repr__(self):
+        return f"TextBuffer({self.getvalue()!r})"
+
+    def getvalue(self):
+        """전체 문자열 반환 (합친 결과를 캐시하고 청크를 하나로 압축)"""
+        if self._value is None:
+            self._value = "".join(self._chunks)
+            self._chunks = [self._value]
+        return self._value
+
+    def clear(self):
+        """버퍼 비우기"""
+        self._chunks = []
+        self._length = 0
+        self._value = ""
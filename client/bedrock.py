@@ -0,0 +1,115 @@
+import threading
+import boto3
+from botocore.config import Config
+
+
+# 커넥션 풀 기본 설정
+DEFAULT_POOL_OPTIONS = {
+    "max_pool_connections": 50,
+    "tcp_keepalive": True,
+    "connect_timeout": 5,
+    "read_timeout": 60,
+}
+
+_pool_options = dict(DEFAULT_POOL_OPTIONS)
+_clients = {}
+_overrides = {}  # region -> 대역 클라이언트
+_warmed = set()
+_lock = threading.Lock()
+
+
+def configure(**options):
+    """커넥션 풀 설정 변경 (이미 생성된 클라이언트는 폐기)"""
+    unknown = set(options) - set(DEFAULT_POOL_OPTIONS)
+    if unknown:
+        raise ValueError(f"알 수 없는 클라이언트 설정: {', '.join(sorted(unknown))}")
+
+    with _lock:
+        _pool_options.update(options)
+        _clients.clear()
+        _warmed.clear()
+
+
+def get_client(region, profile=None, max_attempts=None):
+    """리전/프로파일별로 공유되는 bedrock-runtime 클라이언트 반환
+
+    max_attempts 를 지정하면 botocore 자체 재시도 횟수를 바꾼 별도 클라이언트를 반환한다.
+    (자체 재시도 정책을 쓰는 호출은 1 로 지정하여 재시도가 중복되지 않게 함)
+    """
+    override = _overrides.get(region)
+    if override is not None:
+        return override
+
+    key = (region, profile, max_attempts)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            options = dict(_pool_options)
+            if max_attempts is not None:
+                # botocore 의 max_attempts 는 재시도 횟수이므로 첫 호출을 포함한 total_max_attempts 로 지정
+                options["retries"] = {"mode": "standard", "total_max_attempts": max_attempts}
+
+            # boto3 Session 은 스레드 안전하지 않으므로 잠금 안에서 생성
+            session = boto3.Session(profile_name=profile) if profile else boto3.Session()
+            client = session.client(
+                "bedrock-runtime",
+                region_name=region,
+                config=Config(**options)
+            )
+            _clients[key] = client
+    return client
+
+
+def warm_up(regions, profile=None, connections=1, max_attempts=None):
+    """프로세스 시작 시 클라이언트 생성 및 TLS 연결을 미리 수립"""
+    for region in regions:
+        key = (region, profile, max_attempts)
+        if not region or key in _warmed or region in _overrides:
+            continue
+
+        client = get_client(region, profile, max_attempts)
+        try:
+            _open_connections(client, connections)
+        except Exception:
+            # 워밍업은 최선 노력 방식이므로 실패해도 첫 호출에서 연결됨
+            continue
+        _warmed.add(key)
+
+
+def register_client(region, client):
+    """해당 리전의 모든 호출이 주어진 클라이언트(로컬 대역 등)를 사용하도록 등록"""
+    with _lock:
+        _overrides[region] = client
+
+
+def unregister_client(region):
+    """등록된 대역 클라이언트 해제"""
+    with _lock:
+        _overrides.pop(region, None)
+
+
+def clear():
+    """캐시된 클라이언트 모두 제거"""
+    with _lock:
+        _clients.clear()
+        _warmed.clear()
+
+
+def _open_connections(client, connections):
+    """urllib3 커넥션 풀에 연결을 열어 반환"""
+    manager = client._endpoint.http_session._manager
+    pool = manager.connection_from_url(client.meta.endpoint_url)
+    opened = []
+    try:
+        for _ in range(min(connections, _pool_options["max_pool_connections"])):
+            conn = pool._get_conn()
+            opened.append(conn)
+            conn.connect()
+    finally:
+        # 실패한 경우에도 풀 슬롯은 반드시 반환
+        for conn in opened:
+            pool._put_conn(conn)
@@ -1,16 +1,63 @@
-import boto3
+import math
+from client.bedrock import get_client
+from guardrails.cache import GuardrailCache
+from guardrails.hedge import HedgePolicy
+from guardrails.throttle import AdaptiveLimiter, RetryPolicy
 
 
-def apply_guardrail(text, text_type, region, guardrail_id, guardrail_version):
-    """가드레일 적용 및 결과 분석"""
+# 프로세스 전역 가드레일 결과 캐시
+result_cache = GuardrailCache()
+
+# 모든 관리자가 공유하는 호출량 제한 및 재시도 정책
+limiter = AdaptiveLimiter()
+retry_policy = RetryPolicy(limiter)
+
+# 꼬리 지연 완화를 위한 헤징 정책 (기본 비활성화, hedge_policy.enabled = True 로 사용)
+hedge_policy = HedgePolicy()
+
+# 가드레일 과금·호출 한도의 텍스트 단위 (최대 1000 글자)
+TEXT_UNIT = 1000
+
+
+def text_units(text):
+    """텍스트 길이를 과금 텍스트 단위 수로 환산"""
+    return max(1, math.ceil(len(text) / TEXT_UNIT))
+
+
+def apply_guardrail(text, text_type, region, guardrail_id, guardrail_version, profile=None, use_cache=True,
+                    local_guardrail=None):
+    """가드레일 적용 및 결과 분석 (로컬 검사에서 차단되면 Bedrock 호출 생략, 동일한 텍스트는 캐시된 결과 사용)
+
+    Bedrock 을 호출하지 않은 결과의 응답에는 "source" 가 들어간다 (로컬 차단: "LOCAL", 캐시: "CACHE").
+    """
+    if local_guardrail is not None:
+        status, violations, filtered_text = local_guardrail.check(text)
+        if status == "blocked":
+            return status, violations, filtered_text, local_guardrail.blocked_response()
+
+    if use_cache:
+        cached = result_cache.get(guardrail_id, guardrail_version, text_type, text)
+        if cached is not None:
+            # 호출 지연 측정에서 뺄 수 있도록 캐시 결과임을 표시 (캐시된 응답은 그대로 둠)
+            status, violations, filtered_text, response = cached
+            return status, violations, filtered_text, dict(response, source="CACHE")
+
+    result = _apply_guardrail(text, text_type, region, guardrail_id, guardrail_version, profile)
+    if use_cache:
+        result_cache.put(guardrail_id, guardrail_version, text_type, text, result)
+    return result
+
+
+def _apply_guardrail(text, text_type, region, guardrail_id, guardrail_version, profile):
+    """Bedrock ApplyGuardrail 호출 및 결과 분석"""
     try:
-        client = boto3.client("bedrock-runtime", region_name=region)
-        response = client.apply_guardrail(
+        client = get_client(region, profile, max_attempts=1)
+        response = hedge_policy.call(lambda: retry_policy.call(lambda: client.apply_guardrail(
             guardrailIdentifier=guardrail_id,
             guardrailVersion=guardrail_version,
             source=text_type,
             content=[{"text": {"text": text}}]
-        )
+        )), cost=text_units(text))
 
         # 가드레일 위반 체크
         violations = []
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class GuardrailCache:
+    """가드레일 결과를 보관하는 LRU + TTL 캐시
+
+    키는 (guardrail_id, guardrail_version, source, sha256(text)) 이며,
+    같은 guardrail_id 로 다른 버전이 들어오면 이전 버전의 항목은 모두 폐기한다.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=16 * 1024 * 1024, ttl=300):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        self._entries = OrderedDict()  # key -> (만료 시각, 크기, 값)
+        self._versions = {}  # guardrail_id -> 최근 버전
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, guardrail_id, guardrail_version, source, text):
+        """캐시된 결과 반환 (없거나 만료되었으면 None)"""
+        key = self._make_key(guardrail_id, guardrail_version, source, text)
+        with self._lock:
+            self._check_version(guardrail_id, guardrail_version)
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, guardrail_id, guardrail_version, source, text, value):
+        """결과 저장 후 용량 초과분을 오래된 순서로 제거"""
+        key = self._make_key(guardrail_id, guardrail_version, source, text)
+        size = self._estimate_size(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            self._check_version(guardrail_id, guardrail_version)
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, value)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, guardrail_id=None):
+        """특정 가드레일(또는 전체)의 캐시 항목 제거"""
+        with self._lock:
+            if guardrail_id is None:
+                self._entries.clear()
+                self._versions.clear()
+                self._bytes = 0
+                return
+            self._purge(guardrail_id)
+            self._versions.pop(guardrail_id, None)
+
+    def stats(self):
+        """캐시 사용 현황 반환"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0
+            }
+
+    def _check_version(self, guardrail_id, guardrail_version):
+        """가드레일 버전이 바뀌었으면 이전 버전 항목 폐기"""
+        previous = self._versions.get(guardrail_id)
+        if previous is not None and previous != guardrail_version:
+            self._purge(guardrail_id)
+        self._versions[guardrail_id] = guardrail_version
+
+    def _purge(self, guardrail_id):
+        for key in [key for key in self._entries if key[0] == guardrail_id]:
+            self._remove(key)
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    @staticmethod
+    def _make_key(guardrail_id, guardrail_version, source, text):
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return guardrail_id, guardrail_version, source, digest
+
+    @staticmethod
+    def _estimate_size(value):
+        return len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
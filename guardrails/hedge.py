@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class HedgePolicy:
+    """느린 가드레일 호출에 중복 요청을 보내 먼저 끝난 결과를 사용하는 헤징 정책
+
+    최근 지연 시간의 percentile 만큼 기다려도 응답이 없으면 같은 요청을 한 번 더 보낸다.
+    추가 요청 수는 전체 호출 대비 budget 비율을 넘지 않는다.
+    """
+
+    def __init__(self, enabled=False, percentile=0.95, window=200, min_samples=20, budget=0.1,
+                 min_delay=0.05, max_workers=16):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.budget = budget
+        self.min_delay = min_delay
+
+        self.latencies = deque(maxlen=window)
+        self.calls = 0
+        self.hedges = 0
+        self.wins = 0
+        self.extra_cost = 0
+
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="guardrail-hedge")
+
+    def call(self, func, cost=1):
+        """func 실행 (필요 시 헤징). cost 는 추가 요청 1건당 과금 단위"""
+        with self._lock:
+            self.calls += 1
+        delay = self.hedge_delay() if self.enabled else None
+        if delay is None:
+            started = time.monotonic()
+            result = func()
+            self._record(time.monotonic() - started)
+            return result
+
+        started = time.monotonic()
+        primary = self._executor.submit(func)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._take_budget(cost):
+            result = primary.result()
+            self._record(time.monotonic() - started)
+            return result
+
+        hedge = self._executor.submit(func)
+        pending = {primary, hedge}
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            succeeded = [future for future in done if future.exception() is None]
+            if succeeded or not pending:
+                # 한쪽이 실패하면 다른 쪽 결과를 기다림
+                future = succeeded[0] if succeeded else done.pop()
+                self._record(time.monotonic() - started)
+                if future is hedge and succeeded:
+                    with self._lock:
+                        self.wins += 1
+                return future.result()
+
+    def hedge_delay(self):
+        """헤징 요청을 보낼 대기 시간 (표본이 부족하면 None)"""
+        with self._lock:
+            if not self.latencies or len(self.latencies) < self.min_samples:
+                return None
+            ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile))
+        return max(self.min_delay, ordered[index])
+
+    def stats(self):
+        """헤징 카운터 반환"""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "hedges": self.hedges,
+                "wins": self.wins,
+                "hedge_rate": self.hedges / self.calls if self.calls else 0.0,
+                "extra_cost": self.extra_cost
+            }
+
+    def _take_budget(self, cost):
+        with self._lock:
+            if self.hedges + 1 > self.budget * self.calls:
+                return False
+            self.hedges += 1
+            self.extra_cost += cost
+            return True
+
+    def _record(self, latency):
+        with self._lock:
+            self.latencies.append(latency)
@@ -0,0 +1,522 @@
+import csv
+import heapq
+import multiprocessing
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+DEFAULT_BLOCKED_MESSAGE = "This response has been blocked due to violation of our content policies."
+
+# 정책 설정의 action 값을 가드레일 검사 결과의 action 값으로 변환
+_ACTIONS = {
+    "BLOCK": "BLOCKED",
+    "ANONYMIZE": "ANONYMIZED",
+    "BLOCKED": "BLOCKED",
+    "ANONYMIZED": "ANONYMIZED"
+}
+
+
+class AhoCorasick:
+    """커스텀 단어 목록을 한 번의 텍스트 순회로 찾는 Aho-Corasick 오토마톤
+
+    기본은 부분 문자열 일치라 "ass" 는 "classic" 에서도 찾는다 (조사가 붙는 한국어 단어를 놓치지 않도록).
+    whole_words=True 이면 앞뒤가 글자·숫자·밑줄이 아닌 위치의 일치만 찾는다.
+    """
+
+    def __init__(self, words, case_sensitive=False, whole_words=False):
+        self.case_sensitive = case_sensitive
+        self.whole_words = whole_words
+        self.words = []
+
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [-1]  # 해당 노드에서 끝나는 단어 인덱스
+        self._link = [0]  # 출력이 있는 가장 가까운 접미사 노드
+        self._hit = [False]  # 해당 노드에서 하나 이상의 단어가 끝나는지 여부
+        self.alphabet = set()
+
+        seen = set()
+        for word in words:
+            word = self.normalize(word)
+            if word and word not in seen:
+                seen.add(word)
+                self._add(word)
+        self._build()
+
+    def __len__(self):
+        return len(self.words)
+
+    def normalize(self, text):
+        """대소문자 구분 설정에 맞게 텍스트 정규화"""
+        return text if self.case_sensitive else text.lower()
+
+    def matches_at(self, state):
+        """현재 상태에서 끝나는 단어 인덱스 목록"""
+        found = []
+        if self._out[state] >= 0:
+            found.append(self._out[state])
+        state = self._link[state]
+        while state:
+            found.append(self._out[state])
+            state = self._link[state]
+        return found
+
+    def scan(self, text, state=0):
+        """텍스트를 이어서 읽고 (마지막 상태, [(끝 위치, 단어 인덱스)]) 반환"""
+        alphabet = self.alphabet
+        goto = self._goto
+        fail = self._fail
+        hit = self._hit
+        found = []
+
+        for position, char in enumerate(self.normalize(text)):
+            if char not in alphabet:
+                state = 0
+                continue
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if hit[state]:
+                found.extend((position, index) for index in self.matches_at(state))
+        return state, found
+
+    def iter(self, text, state=0):
+        """(끝 위치, 단어 인덱스) 를 텍스트 순서대로 생성"""
+        for position, index in self.scan(text, state)[1]:
+            if not self.whole_words or self.is_whole(text, position + 1 - len(self.words[index]), position + 1):
+                yield position, index
+
+    @staticmethod
+    def is_whole(text, start, end):
+        """text[start:end] 의 앞뒤가 단어 경계인지 (텍스트 밖은 경계로 봄)"""
+        if start > 0 and _is_word_char(text[start - 1]):
+            return False
+        return end >= len(text) or not _is_word_char(text[end])
+
+    def findall(self, text):
+        """텍스트에 포함된 단어를 발견 순서대로 중복 없이 반환"""
+        found = {}
+        for _, index in self.iter(text):
+            found.setdefault(index, None)
+        return [self.words[index] for index in found]
+
+    def _add(self, word):
+        node = 0
+        for char in word:
+            self.alphabet.add(char)
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(-1)
+                self._link.append(0)
+                self._hit.append(False)
+            node = next_node
+        self._out[node] = len(self.words)
+        self._hit[node] = True
+        self.words.append(word)
+
+    def _build(self):
+        """BFS 로 실패 링크와 출력 링크 계산"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                state = self._fail[node]
+                while state and char not in self._goto[state]:
+                    state = self._fail[state]
+                fallback = self._goto[state].get(char, 0)
+                self._fail[child] = fallback if fallback != child else 0
+
+                suffix = self._fail[child]
+                self._link[child] = suffix if self._out[suffix] >= 0 else self._link[suffix]
+                self._hit[child] = self._out[child] >= 0 or self._link[child] != 0
+
+
+class RegexSet:
+    """여러 정규식을 한 번의 스캔으로 검사하는 정규식 집합
+
+    리터럴 접두사가 있는 패턴은 접두사 트라이 정규식으로, 접두사가 없는 패턴은 결합한 전방 탐색 정규식으로
+    후보 위치만 찾은 뒤 해당 위치에서 패턴마다 다시 검증하므로 결과는 패턴별 re.finditer 와 같다.
+    (결합 정규식을 그대로 스캔하면 한 위치에서 첫 번째로 매치한 패턴만 남아 겹치는 다른 패턴을 놓친다.)
+    """
+
+    def __init__(self, regexes):
+        self.names = []
+        self.actions = {}
+        self._compiled = []
+        self._prefixes = {}  # 리터럴 접두사 -> 패턴 인덱스 목록
+        residual = []
+
+        for index, regex in enumerate(regexes):
+            if isinstance(regex, str):
+                regex = {"name": regex, "pattern": regex, "action": "BLOCK"}
+            self.names.append(regex["name"])
+            self.actions[regex["name"]] = _ACTIONS[regex.get("action", "BLOCK").upper()]
+            self._compiled.append(re.compile(regex["pattern"]))
+
+            prefix = _literal_prefix(regex["pattern"])
+            if prefix:
+                self._prefixes.setdefault(prefix, []).append(index)
+            else:
+                residual.append(index)
+
+        self._trie = _build_trie(self._prefixes)
+        self._candidates = re.compile(f"(?=(?:{_trie_regex(self._trie)}))") if self._prefixes else None
+        # 역참조는 결합하면 그룹 번호가 바뀌므로 따로 검사
+        self._separate = [index for index in residual if _BACKREFERENCE.search(self._compiled[index].pattern)]
+        self._residual = [index for index in residual if index not in self._separate]
+        self._residual_candidates = None
+        if self._residual:
+            try:
+                self._residual_candidates = re.compile("(?=" + "|".join(
+                    f"(?:{self._compiled[index].pattern})" for index in self._residual
+                ) + ")")
+            except re.error:
+                # 그룹 이름 충돌 등으로 결합할 수 없으면 패턴별로 검사
+                self._separate = residual
+                self._residual = []
+
+    def __len__(self):
+        return len(self.names)
+
+    def finditer(self, text):
+        """(패턴 이름, 시작 위치, 끝 위치) 생성"""
+        next_start = {}  # 패턴별로 이전 매치가 끝난 위치 (그 앞에서 시작하는 매치는 re.finditer 가 내지 않음)
+        for position, prefixed in self._candidate_positions(text):
+            indexes = self._walk_trie(text, position) if prefixed else self._residual
+            for index in indexes:
+                if position < next_start.get(index, 0):
+                    continue
+                match = self._compiled[index].match(text, position)
+                if match:
+                    # 빈 매치 뒤에는 다음 위치부터 찾음
+                    next_start[index] = match.end() if match.end() > position else position + 1
+                    yield self.names[index], match.start(), match.end()
+
+        for index in self._separate:
+            for match in self._compiled[index].finditer(text):
+                yield self.names[index], match.start(), match.end()
+
+    def anonymize(self, text, matches=None):
+        """ANONYMIZE 대상 매치를 {패턴 이름} 으로 치환 (겹치는 매치는 앞의 것 우선)
+
+        matches 에 이미 찾은 (패턴 이름, 시작, 끝) 목록을 주면 다시 검사하지 않는다.
+        """
+        spans = sorted(
+            (start, -end, name) for name, start, end in (self.finditer(text) if matches is None else matches)
+            if self.actions[name] == "ANONYMIZED" and end > start
+        )
+        parts = []
+        position = 0
+        for start, negative_end, name in spans:
+            if start < position:
+                continue
+            parts.append(text[position:start])
+            parts.append("{" + name + "}")
+            position = -negative_end
+        parts.append(text[position:])
+        return "".join(parts)
+
+    def _candidate_positions(self, text):
+        """(후보 위치, 접두사 패턴 여부) 를 위치 순서대로 생성"""
+        streams = []
+        if self._candidates is not None:
+            streams.append((match.start(), True) for match in self._candidates.finditer(text))
+        if self._residual_candidates is not None:
+            streams.append((match.start(), False) for match in self._residual_candidates.finditer(text))
+        return heapq.merge(*streams)
+
+    def _walk_trie(self, text, position):
+        """position 에서 시작하는 모든 리터럴 접두사의 패턴 인덱스"""
+        node = self._trie
+        for char in text[position:position + _MAX_PREFIX]:
+            node = node.get(char)
+            if node is None:
+                return
+            if None in node:
+                yield from node[None]
+
+
+# 접두사 검증 시 확인할 최대 길이
+_MAX_PREFIX = 64
+_META = set(".^$*+?{}[]\\|()")
+_BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+
+
+def _literal_prefix(pattern):
+    """패턴의 모든 매치가 반드시 시작하는 리터럴 접두사 (없으면 빈 문자열)"""
+    if "|" in pattern:
+        return ""
+
+    prefix = []
+    i = 0
+    while i < len(pattern) and len(prefix) < _MAX_PREFIX:
+        char = pattern[i]
+        if char == "\\":
+            if i + 1 >= len(pattern) or pattern[i + 1].isalnum():
+                break
+            literal, step = pattern[i + 1], 2
+        elif char in _META:
+            break
+        else:
+            literal, step = char, 1
+
+        following = pattern[i + step:i + step + 1]
+        if following in ("*", "?", "{"):
+            break
+        prefix.append(literal)
+        if following == "+":
+            break
+        i += step
+    return "".join(prefix)
+
+
+def _build_trie(prefixes):
+    """접두사 트라이 생성 (None 키에 해당 접두사의 패턴 인덱스 저장)"""
+    trie = {}
+    for prefix, indexes in prefixes.items():
+        node = trie
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node[None] = indexes
+    return trie
+
+
+def _trie_regex(node):
+    """트라이를 분기 정규식으로 변환 (가장 짧은 접두사에서 매치 성공)"""
+    if None in node:
+        return ""
+    branches = [re.escape(char) + _trie_regex(child) for char, child in node.items() if char is not None]
+    return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+
+# 작업 프로세스마다 한 번 컴파일해 두는 정규식 집합
+_worker_regexes = None
+
+
+def _init_worker(regexes):
+    global _worker_regexes
+    _worker_regexes = RegexSet(regexes)
+
+
+def _scan(text):
+    """(매치 목록, 검사 시간) 반환"""
+    start = time.perf_counter()
+    matches = list(_worker_regexes.finditer(text))
+    return matches, time.perf_counter() - start
+
+
+class RegexPool:
+    """정규식 검사를 별도 프로세스에서 실행하여 GIL 을 잡지 않도록 하는 풀
+
+    작업 프로세스는 처음 필요할 때 시작하며, 시작 시 패턴을 한 번만 컴파일한다.
+    작업 프로세스로는 텍스트만 보내고 (패턴 이름, 시작, 끝) 목록만 받는다.
+    프로세스 간 전달 비용(수백 us)이 검사 비용보다 큰 경우, 즉 min_chars 보다 짧은 텍스트이거나
+    측정한 글자당 검사 시간으로 예상한 검사 시간이 min_scan_time 초보다 짧으면 호출한 스레드에서 검사한다.
+    풀이 비정상 종료된 경우에도 호출한 스레드에서 검사한다.
+    """
+
+    def __init__(self, regexes, regex_set, workers=2, min_chars=1000, min_scan_time=0.002, smoothing=0.3):
+        self.regexes = list(regexes)
+        self.regex_set = regex_set
+        self.workers = workers
+        self.min_chars = min_chars
+        self.min_scan_time = min_scan_time
+        self.smoothing = smoothing
+        self.cost_per_char = None  # 측정한 글자당 검사 시간(초)
+        self.offloaded = 0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """작업 프로세스를 미리 시작 (첫 검사에서 프로세스 시작 지연을 피할 때 사용)"""
+        executor = self._get_executor()
+        for future in [executor.submit(_scan, "") for _ in range(self.workers)]:
+            future.result()
+
+    def finditer(self, text):
+        """(패턴 이름, 시작 위치, 끝 위치) 목록 반환"""
+        if self._offload(text):
+            try:
+                matches, elapsed = self._get_executor().submit(_scan, text).result()
+            except BrokenProcessPool:
+                # 작업 프로세스가 종료된 경우 다음 검사에서 새로 시작
+                with self._lock:
+                    self._executor = None
+            else:
+                self.offloaded += 1
+                self._observe(len(text), elapsed)
+                return matches
+
+        start = time.perf_counter()
+        matches = list(self.regex_set.finditer(text))
+        self._observe(len(text), time.perf_counter() - start)
+        return matches
+
+    def close(self):
+        """작업 프로세스 종료"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _offload(self, text):
+        """작업 프로세스에서 검사할지 여부 (아직 측정값이 없으면 한 번은 직접 검사해서 잼)"""
+        if len(text) < self.min_chars or not self.regex_set or self.cost_per_char is None:
+            return False
+        return self.cost_per_char * len(text) >= self.min_scan_time
+
+    def _observe(self, chars, elapsed):
+        if not chars:
+            return
+        cost = elapsed / chars
+        current = self.cost_per_char
+        self.cost_per_char = cost if current is None else current + self.smoothing * (cost - current)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # 스레드가 있는 프로세스(Streamlit 등)에서 fork 하지 않도록 spawn 사용
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.regexes,)
+                )
+            return self._executor
+
+
+class LocalGuardrail:
+    """네트워크 호출 없이 커스텀 단어와 정규식 정책을 검사하는 로컬 가드레일"""
+
+    def __init__(self, words=(), regexes=(), blocked_message=DEFAULT_BLOCKED_MESSAGE, case_sensitive=False,
+                 regex_workers=0, regex_min_chars=1000, whole_words=False):
+        """words: 단어 문자열 또는 {'text': 단어} 목록, regexes: 패턴 문자열 또는 regexesConfig 형식 목록
+
+        regex_workers 가 0 보다 크면 regex_min_chars 글자 이상인 텍스트의 정규식 검사를 그 수만큼의 작업 프로세스에서 실행
+        whole_words=True 이면 단어를 부분 문자열이 아닌 단어 경계 단위로 찾음
+        """
+        words = [word["text"] if isinstance(word, dict) else word for word in words]
+        self.automaton = AhoCorasick(words, case_sensitive, whole_words)
+        self.regexes = RegexSet(regexes)
+        self.regex_pool = RegexPool(regexes, self.regexes, regex_workers, regex_min_chars) if regex_workers > 0 else None
+        self.blocked_message = blocked_message
+
+    @classmethod
+    def from_policy(cls, word_policy_config=None, sensitive_information_policy_config=None,
+                    blocked_message=DEFAULT_BLOCKED_MESSAGE, **options):
+        """create_guardrail 의 wordPolicyConfig / sensitiveInformationPolicyConfig 형식으로 생성"""
+        words = (word_policy_config or {}).get("wordsConfig", [])
+        regexes = (sensitive_information_policy_config or {}).get("regexesConfig", [])
+        return cls(words, regexes, blocked_message, **options)
+
+    def close(self):
+        """정규식 검사 작업 프로세스 종료"""
+        if self.regex_pool is not None:
+            self.regex_pool.close()
+
+    def blocked_response(self):
+        """로컬 차단 시 ApplyGuardrail 응답 형식의 결과"""
+        return {
+            "action": "GUARDRAIL_INTERVENED",
+            "source": "LOCAL",
+            "outputs": [{"text": self.blocked_message}]
+        }
+
+    def check(self, text):
+        """(status, violations, filtered_text) 반환"""
+        violations = []
+        for word in self.automaton.findall(text):
+            violations.append({
+                "Category": "Custom word filters",
+                "Action": "BLOCKED",
+                "Name": word
+            })
+
+        matches = self.regex_pool.finditer(text) if self.regex_pool is not None else list(self.regexes.finditer(text))
+        matched = {}
+        for name, _, _ in matches:
+            matched.setdefault(name, self.regexes.actions[name])
+        for name, action in matched.items():
+            violations.append({
+                "Category": "Regex filter",
+                "Action": action,
+                "Name": name
+            })
+
+        if any(v['Action'] == 'BLOCKED' for v in violations):
+            return "blocked", violations, self.blocked_message
+
+        elif violations:
+            return "anonymized", violations, self.regexes.anonymize(text, matches)
+
+        else:
+            return "passed", [], text
+
+
+class StreamingMatcher:
+    """스트리밍 델타를 순서대로 받아 청크 경계를 넘는 금지어를 완성 즉시 찾는 매처
+
+    오토마톤이 whole_words 이면 델타 끝에서 끝난 단어는 다음 델타의 첫 글자를 보고 판단한다.
+    (스트림 마지막 글자에서 끝난 단어는 마지막 버퍼의 LocalGuardrail.check 에서 찾음)
+    """
+
+    def __init__(self, automaton):
+        self.automaton = automaton
+        self.state = 0
+        self.position = 0
+        self.recent = ""  # 단어 앞 글자를 볼 수 있도록 가장 긴 단어보다 한 글자 더 보관
+        self.pending = []  # 다음 글자를 기다리는 [(단어, 끝 위치)]
+        self._window = max((len(word) for word in automaton.words), default=0) + 1
+
+    def feed(self, text):
+        """새 델타를 읽고 이번에 완성된 [(단어, 전체 스트림 기준 끝 위치)] 반환"""
+        self.state, found = self.automaton.scan(text, self.state)
+        offset = self.position
+        self.position += len(text)
+        matches = [(self.automaton.words[index], offset + position) for position, index in found]
+        if not self.automaton.whole_words:
+            return matches
+
+        window = self.recent + text
+        base = offset - len(self.recent)  # window[0] 의 스트림 기준 위치
+        whole = []
+        pending = []
+        for word, end in self.pending + matches:
+            if end + 1 >= self.position:
+                pending.append((word, end))
+            elif self.automaton.is_whole(window, end + 1 - len(word) - base, end + 1 - base):
+                whole.append((word, end))
+        self.pending = pending
+        self.recent = window[-self._window:]
+        return whole
+
+    def reset(self):
+        """새 스트림을 위해 상태 초기화"""
+        self.state = 0
+        self.position = 0
+        self.recent = ""
+        self.pending = []
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == "_"
+
+
+def load_words(file_path):
+    """헤더가 있는 CSV 파일의 첫 번째 열을 단어 목록으로 로드
+
+    단어는 기본적으로 부분 문자열로 일치하므로 짧은 단어는 다른 단어 안에서도 차단된다 (AhoCorasick 의 whole_words 참고).
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader, None)  # 헤더 스킵
+        return [row[0] for row in reader if row]
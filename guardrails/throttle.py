@@ -0,0 +1,143 @@
+import random
+import threading
+import time
+from botocore.exceptions import ClientError
+
+
+# 호출량 제한으로 판단하여 동시성/속도를 줄이는 오류
+THROTTLING_ERRORS = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceQuotaExceededException",
+}
+
+# 일시적 오류로 판단하여 재시도만 하는 오류
+TRANSIENT_ERRORS = {
+    "ServiceUnavailableException",
+    "InternalServerException",
+    "ModelNotReadyException",
+}
+
+
+class AdaptiveLimiter:
+    """프로세스 전역 AIMD 동시성 제한 + 토큰 버킷
+
+    성공하면 허용 속도와 동시성을 조금씩 늘리고(additive increase),
+    스로틀링이 발생하면 절반으로 줄인다(multiplicative decrease).
+    """
+
+    def __init__(self, rate=20.0, min_rate=1.0, max_rate=200.0, concurrency=8, min_concurrency=1,
+                 max_concurrency=64, increase=1.0, decrease=0.5, cooldown=1.0):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.concurrency = concurrency
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+
+        self.tokens = 1.0
+        self.in_flight = 0
+        self.throttles = 0
+        self.successes = 0
+        self.total_wait = 0.0
+
+        self._last_refill = time.monotonic()
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """토큰과 동시 실행 슬롯을 얻을 때까지 대기"""
+        started = time.monotonic()
+        with self._condition:
+            while True:
+                self._refill()
+                if self.in_flight < int(self.concurrency) and self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    self.in_flight += 1
+                    self.total_wait += time.monotonic() - started
+                    return
+                if self.tokens < 1.0:
+                    self._condition.wait((1.0 - self.tokens) / self.rate)
+                else:
+                    self._condition.wait()
+
+    def release(self, throttled=False):
+        """호출 결과에 따라 허용량 조정 후 슬롯 반환"""
+        with self._condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if throttled:
+                self.throttles += 1
+                # 같은 혼잡으로 연달아 발생한 스로틀링은 한 번만 반영
+                if now - self._last_decrease >= self.cooldown:
+                    self.rate = max(self.min_rate, self.rate * self.decrease)
+                    self.concurrency = max(self.min_concurrency, self.concurrency * self.decrease)
+                    self.tokens = min(self.tokens, 1.0)
+                    self._last_decrease = now
+            else:
+                self.successes += 1
+                self.rate = min(self.max_rate, self.rate + self.increase / max(self.rate, 1.0))
+                self.concurrency = min(self.max_concurrency, self.concurrency + self.increase / max(self.concurrency, 1.0))
+            self._condition.notify_all()
+
+    def stats(self):
+        """현재 허용량과 누적 카운터 반환"""
+        with self._condition:
+            return {
+                "rate": self.rate,
+                "concurrency": int(self.concurrency),
+                "in_flight": self.in_flight,
+                "successes": self.successes,
+                "throttles": self.throttles,
+                "total_wait": self.total_wait
+            }
+
+    def _refill(self):
+        now = time.monotonic()
+        # 버스트는 1초 분량으로 제한
+        self.tokens = min(max(self.rate, 1.0), self.tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+
+class RetryPolicy:
+    """스로틀링/일시적 오류에 대해 지터가 있는 지수 백오프로 재시도"""
+
+    def __init__(self, limiter=None, max_attempts=8, base_delay=0.1, max_delay=5.0):
+        self.limiter = limiter
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+
+    def call(self, func):
+        """func 를 제한기 안에서 실행하고 재시도 가능한 오류는 백오프 후 재시도"""
+        for attempt in range(self.max_attempts):
+            if self.limiter is not None:
+                self.limiter.acquire()
+            try:
+                result = func()
+            except ClientError as e:
+                code = e.response.get('Error', {}).get('Code', '')
+                throttled = code in THROTTLING_ERRORS
+                if self.limiter is not None:
+                    self.limiter.release(throttled=throttled)
+                if not (throttled or code in TRANSIENT_ERRORS) or attempt == self.max_attempts - 1:
+                    raise
+            except Exception:
+                if self.limiter is not None:
+                    self.limiter.release()
+                raise
+            else:
+                if self.limiter is not None:
+                    self.limiter.release()
+                return result
+
+            self.retries += 1
+            time.sleep(self._backoff(attempt))
+
+    def _backoff(self, attempt):
+        """full jitter 지수 백오프"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
@@ -1,10 +1,10 @@
-import boto3
+from client.bedrock import get_client
 
 
-def get_streaming_response(prompt, model_id, region):
+def get_streaming_response(prompt, model_id, region, profile=None):
     """Bedrock LLM 스트리밍 응답 호출"""
     try:
-        client = boto3.client("bedrock-runtime", region_name=region)
+        client = get_client(region, profile)
         response = client.converse_stream(
             modelId=model_id,
             messages=[{
@@ -1,8 +1,15 @@
 import streamlit as st
 from llm.bedrock import get_streaming_response
+from client.bedrock import warm_up
+from guardrails.local import LocalGuardrail, load_words
+from buffer_manager.base_manager import submit_input_check
 from buffer_manager.post_guardrail_manager import PostGuardrailManager
 from buffer_manager.pre_guardrail_manager import PreGuardrailManager
 from buffer_manager.dynamic_guardrail_manager import DynamicGuardrailManager
+from buffer_manager.segmenter import Segmenter
+from buffer_manager.buffer_controller import get_profile
+from buffer_manager.metrics import serve_prometheus
+from stub.trace import start_recording
 
 
 # 설정값
@@ -25,6 +32,32 @@ GUARDRAIL_CONFIG = {
 }
 
 
+@st.cache_resource
+def load_local_guardrail(file_path, whole_words):
+    """로컬 사전 검사 오토마톤은 스크립트가 다시 실행되어도 한 번만 생성"""
+    return LocalGuardrail(load_words(file_path), whole_words=whole_words)
+
+
+# 로컬 사전 검사 단어 목록 (설정된 경우에만 사용)
+if st.secrets.get("LOCAL_GUARDRAIL_WORDS_FILE"):
+    GUARDRAIL_CONFIG["local_guardrail"] = load_local_guardrail(
+        st.secrets["LOCAL_GUARDRAIL_WORDS_FILE"],
+        bool(st.secrets.get("LOCAL_GUARDRAIL_WHOLE_WORDS", False))
+    )
+
+
+@st.cache_resource
+def start_metrics_server(port):
+    """Prometheus 메트릭 서버는 스크립트가 다시 실행되어도 한 번만 시작"""
+    return serve_prometheus(port)
+
+
+@st.cache_resource
+def start_trace_recording(path):
+    """LLM 스트림과 가드레일 결과 기록은 스크립트가 다시 실행되어도 한 번만 시작"""
+    return start_recording(path, [GUARDRAIL_CONFIG["region"], st.secrets["BEDROCK_REGION"]])
+
+
 def show_architecture_image(selected_manager):
     image_paths = {
         "실시간 스트리밍 (가드레일 후처리)": "static/post_guardrail_arch.png",
@@ -43,6 +76,18 @@ def main():
     st.set_page_config(page_title="Guardrails Demo")
     st.title("🤖 Bedrock Guardrails 데모")
 
+    # bedrock-runtime 클라이언트 및 연결 미리 준비
+    warm_up([GUARDRAIL_CONFIG["region"]], max_attempts=1)
+    warm_up([st.secrets["BEDROCK_REGION"]])
+
+    # 처리 지연·처리량 메트릭 노출 (설정된 경우에만 사용)
+    if st.secrets.get("METRICS_PORT"):
+        start_metrics_server(int(st.secrets["METRICS_PORT"]))
+
+    # 오프라인 재생용 트레이스 기록 (설정된 경우에만 사용)
+    if st.secrets.get("TRACE_FILE"):
+        start_trace_recording(st.secrets["TRACE_FILE"])
+
     # 사이드바 설정
     st.sidebar.header("설정")
     selected_model = st.sidebar.selectbox(
@@ -77,7 +122,7 @@ def main():
             max_value=1000,
             value=500,
             step=10,
-            help="두번째 버퍼 크기"
+            help="두번째 버퍼 크기 (이후 버퍼 크기를 자동 조정할 때의 최소값)"
         )
         buffer_size = st.sidebar.slider(
             "이후 버퍼 크기",
@@ -85,7 +130,7 @@ def main():
             max_value=1000,
             value=1000,
             step=10,
-            help="두 번째 이후 응답의 버퍼 크기"
+            help="두 번째 이후 응답의 버퍼 크기 (자동 조정할 때의 최대값)"
         )
     else:
         initial_buffer_size = 0
@@ -99,6 +144,24 @@ def main():
             help="한 번에 처리할 텍스트 단위 크기"
         )
 
+    # 백그라운드 검사 설정
+    is_post = selected_manager == "실시간 스트리밍 (가드레일 후처리)"
+    pipelined = st.sidebar.toggle(
+        '백그라운드 가드레일 검사',
+        value=is_post,
+        help="버퍼 검사 중에도 다음 버퍼를 계속 채우고 표시합니다. 후처리 방식에서는 늦게 도착한 결과로 표시된 텍스트를 교체합니다"
+    )
+
+    # 버퍼 분할 설정
+    overlap = st.sidebar.slider(
+        "검사 구간 겹침",
+        min_value=0,
+        max_value=100,
+        value=0,
+        step=10,
+        help="문장 중간에서 버퍼를 자를 때 마지막 어절들을 다음 검사에 다시 포함할 글자 수"
+    )
+
     # 디버그 모드 설정
     debug_mode = st.sidebar.toggle('가드레일 검사 결과 표시', value=True, help="가드레일 검사 과정과 결과를 실시간으로 확인할 수 있습니다")
 
@@ -110,6 +173,9 @@ def main():
 
     if st.button("답변 생성") and user_input:
         try:
+            # 입력 가드레일 검사는 LLM 호출과 동시에 진행 (결과가 나올 때까지 출력 보류)
+            input_check = submit_input_check(user_input, GUARDRAIL_CONFIG)
+
             # LLM 호출
             response = get_streaming_response(
                 prompt=user_input,
@@ -119,6 +185,7 @@ def main():
 
             # 선택된 버퍼 매니저로 응답 처리
             buffer_manager_class = BUFFER_MANAGERS[selected_manager]
+            manager_options = {"segmenter": Segmenter(overlap=overlap), "pipelined": pipelined}
             if selected_manager == "동적 버퍼 처리 (가드레일 선처리)":
                 buffer_manager = buffer_manager_class(
                     placeholder=st.container(),
@@ -126,16 +193,19 @@ def main():
                     second_buffer_size=second_buffer_size,
                     subsequent_buffer_size=buffer_size,
                     guardrail_config=GUARDRAIL_CONFIG,
-                    debug_mode=debug_mode
+                    debug_mode=debug_mode,
+                    rate_profile=get_profile(MODEL_ID[selected_model]),
+                    **manager_options
                 )
             else:
                 buffer_manager = buffer_manager_class(
                     placeholder=st.container(),
                     buffer_size=buffer_size,
                     guardrail_config=GUARDRAIL_CONFIG,
-                    debug_mode=debug_mode
+                    debug_mode=debug_mode,
+                    **manager_options
                 )
-            buffer_manager.process_stream(response)
+            buffer_manager.process_stream(response, input_check)
 
         except Exception as e:
             st.error(f"오류가 발생했습니다: {str(e)}")
@@ -0,0 +1,250 @@
+import hashlib
+import math
+import random
+import threading
+import time
+from botocore.exceptions import ClientError
+from guardrails.local import LocalGuardrail
+
+
+# 기본 응답 생성에 사용하는 문장
+_SENTENCES = [
+    "Amazon Bedrock 가드레일은 생성형 AI 응답의 안전성을 높여 줍니다.",
+    "스트리밍 응답은 버퍼 단위로 나누어 검사할 수 있습니다.",
+    "The guardrail checks each buffer before it is shown to the user.",
+    "버퍼 크기가 작을수록 첫 응답은 빨라지지만 호출 횟수는 늘어납니다.",
+    "Latency and cost depend on how often the guardrail is called.",
+    "세계적인 CEO들은 각자의 방식으로 회사를 성장시켰습니다.",
+    "Each paragraph in this answer is generated by a local stub model.",
+    "연락처 예시는 010-1234-5678 과 같은 형식입니다.",
+]
+
+
+class LatencyModel:
+    """초 단위 지연 시간 분포 (constant, uniform, lognormal, empirical)"""
+
+    def __init__(self, distribution="lognormal", mean=0.3, stddev=0.1, minimum=0.0, maximum=None,
+                 samples=None, seed=None):
+        self.distribution = distribution
+        self.mean = mean
+        self.stddev = stddev
+        self.minimum = minimum
+        self.maximum = maximum
+        self.samples = list(samples or [])
+        self._random = random.Random(seed)
+
+        if distribution == "lognormal" and mean > 0:
+            sigma_squared = math.log(1 + (stddev / mean) ** 2)
+            self._mu = math.log(mean) - sigma_squared / 2
+            self._sigma = math.sqrt(sigma_squared)
+
+    @classmethod
+    def constant(cls, value):
+        return cls("constant", mean=value)
+
+    def sample(self):
+        """지연 시간 하나를 샘플링"""
+        if self.distribution == "constant" or (self.mean <= 0 and self.distribution != "empirical"):
+            value = self.mean
+        elif self.distribution == "uniform":
+            value = self._random.uniform(self.mean - self.stddev, self.mean + self.stddev)
+        elif self.distribution == "lognormal":
+            value = self._random.lognormvariate(self._mu, self._sigma)
+        elif self.distribution == "empirical":
+            value = self._random.choice(self.samples)
+        else:
+            raise ValueError(f"알 수 없는 지연 분포: {self.distribution}")
+
+        value = max(self.minimum, value)
+        return min(self.maximum, value) if self.maximum is not None else value
+
+
+class StubEventStream:
+    """converse_stream 의 EventStream 을 흉내내는 이벤트 반복자"""
+
+    def __init__(self, events):
+        self._events = events
+        self.closed = False
+
+    def __iter__(self):
+        for event in self._events:
+            if self.closed:
+                return
+            yield event
+
+    def close(self):
+        """남은 이벤트 생성 중단"""
+        self.closed = True
+
+
+class StubBedrockRuntime:
+    """Bedrock 없이 converse_stream / apply_guardrail 을 흉내내는 로컬 bedrock-runtime 대역
+
+    client.bedrock.register_client() 로 등록하면 기존 코드가 그대로 이 객체를 사용한다.
+    time_scale 을 0 으로 두면 지연 없이 최대 속도로 동작한다.
+    """
+
+    def __init__(self, response_text=None, tokens_per_second=60.0, chars_per_token=3, tokens_per_delta=3,
+                 first_token_latency=None, guardrail_latency=None, blocked_words=(), regexes=(),
+                 blocked_message="This response has been blocked due to violation of our content policies.",
+                 max_tps=None, throttle_rate=0.0, time_scale=1.0, seed=None):
+        """response_text: 고정 응답 문자열 또는 prompt 를 받아 응답을 만드는 함수"""
+        self.response_text = response_text
+        self.tokens_per_second = tokens_per_second
+        self.chars_per_token = chars_per_token
+        self.tokens_per_delta = tokens_per_delta
+        self.first_token_latency = first_token_latency or LatencyModel("lognormal", mean=0.5, stddev=0.15, seed=seed)
+        self.guardrail_latency = guardrail_latency or LatencyModel("lognormal", mean=0.3, stddev=0.1, seed=seed)
+        self.guardrail = LocalGuardrail(blocked_words, regexes, blocked_message)
+        self.max_tps = max_tps
+        self.throttle_rate = throttle_rate
+        self.time_scale = time_scale
+
+        self.converse_calls = 0
+        self.guardrail_calls = 0
+        self.throttled_calls = 0
+        self.text_units = 0
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = float(max_tps or 0)
+        self._last_refill = time.monotonic()
+
+    def converse_stream(self, modelId, messages, inferenceConfig=None, **kwargs):
+        """converse_stream 응답 형식으로 스트리밍 이벤트 반환"""
+        with self._lock:
+            self.converse_calls += 1
+        prompt = "".join(block.get("text", "") for message in messages for block in message.get("content", []))
+        max_tokens = (inferenceConfig or {}).get("maxTokens", 3000)
+        text = self._response_for(prompt, max_tokens)
+
+        return {
+            "ResponseMetadata": {"HTTPStatusCode": 200},
+            "stream": StubEventStream(self._events(prompt, text, max_tokens))
+        }
+
+    def apply_guardrail(self, guardrailIdentifier, guardrailVersion, source, content, **kwargs):
+        """apply_guardrail 응답 형식으로 개입 규칙 적용 결과 반환"""
+        self._check_throttle()
+        text = "".join(block["text"]["text"] for block in content if "text" in block)
+        text_units = max(1, math.ceil(len(text) / 1000))
+        latency = self.guardrail_latency.sample()
+        self._sleep(latency)
+
+        with self._lock:
+            self.guardrail_calls += 1
+            self.text_units += text_units
+
+        status, violations, filtered_text = self.guardrail.check(text)
+        assessment = {
+            "invocationMetrics": {
+                "guardrailProcessingLatency": int(latency * 1000),
+                "usage": {"contentPolicyUnits": text_units, "wordPolicyUnits": text_units,
+                          "sensitiveInformationPolicyUnits": text_units},
+                "guardrailCoverage": {"textCharacters": {"guarded": len(text), "total": len(text)}}
+            }
+        }
+        words = [{"match": v["Name"], "action": v["Action"]} for v in violations
+                 if v["Category"] == "Custom word filters"]
+        regexes = [{"name": v["Name"], "match": v["Name"], "regex": v["Name"], "action": v["Action"]}
+                   for v in violations if v["Category"] == "Regex filter"]
+        if words:
+            assessment["wordPolicy"] = {"customWords": words, "managedWordLists": []}
+        if regexes:
+            assessment["sensitiveInformationPolicy"] = {"piiEntities": [], "regexes": regexes}
+
+        return {
+            "ResponseMetadata": {"HTTPStatusCode": 200},
+            "usage": assessment["invocationMetrics"]["usage"],
+            "action": "GUARDRAIL_INTERVENED" if violations else "NONE",
+            "outputs": [{"text": filtered_text}] if violations else [],
+            "assessments": [assessment]
+        }
+
+    def stats(self):
+        """호출 카운터 반환"""
+        with self._lock:
+            return {
+                "converse_calls": self.converse_calls,
+                "guardrail_calls": self.guardrail_calls,
+                "throttled_calls": self.throttled_calls,
+                "text_units": self.text_units
+            }
+
+    def _events(self, prompt, text, max_tokens):
+        """실제 스트림과 같은 순서로 이벤트 생성"""
+        started = time.monotonic()
+        yield {"messageStart": {"role": "assistant"}}
+
+        delay = self.first_token_latency.sample()
+        delta_chars = max(1, self.tokens_per_delta * self.chars_per_token)
+        interval = self.tokens_per_delta / self.tokens_per_second if self.tokens_per_second else 0.0
+        for index, position in enumerate(range(0, len(text), delta_chars)):
+            # 누적 오차가 없도록 시작 시각 기준으로 목표 시각까지 대기
+            self._sleep_until(started, delay + index * interval)
+            yield {"contentBlockDelta": {"delta": {"text": text[position:position + delta_chars]}, "contentBlockIndex": 0}}
+
+        yield {"contentBlockStop": {"contentBlockIndex": 0}}
+        output_tokens = math.ceil(len(text) / self.chars_per_token)
+        yield {"messageStop": {"stopReason": "max_tokens" if output_tokens >= max_tokens else "end_turn"}}
+        yield {
+            "metadata": {
+                "usage": {
+                    "inputTokens": math.ceil(len(prompt) / self.chars_per_token),
+                    "outputTokens": output_tokens,
+                    "totalTokens": math.ceil(len(prompt) / self.chars_per_token) + output_tokens
+                },
+                "metrics": {"latencyMs": int((time.monotonic() - started) * 1000)}
+            }
+        }
+
+    def _response_for(self, prompt, max_tokens):
+        """프롬프트에 대해 결정적인 응답 텍스트 생성"""
+        if callable(self.response_text):
+            text = self.response_text(prompt)
+        elif self.response_text is not None:
+            text = self.response_text
+        else:
+            seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+            generator = random.Random(seed)
+            sentences = []
+            length = 0
+            while length < 2000:
+                sentence = generator.choice(_SENTENCES)
+                sentences.append(sentence)
+                length += len(sentence) + 1
+            text = " ".join(sentences)
+        return text[:max_tokens * self.chars_per_token]
+
+    def _check_throttle(self):
+        """허용 TPS 를 넘거나 확률적으로 ThrottlingException 발생"""
+        with self._lock:
+            throttled = self.throttle_rate and self._random.random() < self.throttle_rate
+            if self.max_tps and not throttled:
+                now = time.monotonic()
+                self._tokens = min(self.max_tps, self._tokens + (now - self._last_refill) * self.max_tps)
+                self._last_refill = now
+                if self._tokens < 1.0:
+                    throttled = True
+                else:
+                    self._tokens -= 1.0
+            if throttled:
+                self.throttled_calls += 1
+
+        if throttled:
+            raise ClientError(
+                {"Error": {"Code": "ThrottlingException", "Message": "Too many requests, please wait before trying again."},
+                 "ResponseMetadata": {"HTTPStatusCode": 429}},
+                "ApplyGuardrail"
+            )
+
+    def _sleep(self, seconds):
+        if self.time_scale and seconds > 0:
+            time.sleep(seconds * self.time_scale)
+
+    def _sleep_until(self, started, offset):
+        if not self.time_scale:
+            return
+        remaining = started + offset * self.time_scale - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
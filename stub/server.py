@@ -0,0 +1,192 @@
+import argparse
+import json
+import re
+import struct
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+from botocore.exceptions import ClientError
+from stub.bedrock import LatencyModel, StubBedrockRuntime
+from stub.trace import ReplayBedrockRuntime, Trace
+
+
+_CONVERSE_STREAM = re.compile(r"^/model/(?P<model>[^/]+)/converse-stream$")
+_APPLY_GUARDRAIL = re.compile(r"^/guardrail/(?P<id>[^/]+)/version/(?P<version>[^/]+)/apply$")
+
+
+def encode_event(event_type, payload, message_type="event"):
+    """AWS event stream(application/vnd.amazon.eventstream) 메시지 인코딩"""
+    type_header = ":exception-type" if message_type == "exception" else ":event-type"
+    headers = b"".join(
+        _encode_header(name, value) for name, value in (
+            (type_header, event_type),
+            (":content-type", "application/json"),
+            (":message-type", message_type),
+        )
+    )
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    total_length = 12 + len(headers) + len(body) + 4
+    prelude = struct.pack(">II", total_length, len(headers))
+    message = prelude + struct.pack(">I", zlib.crc32(prelude)) + headers + body
+    return message + struct.pack(">I", zlib.crc32(message))
+
+
+def _encode_header(name, value):
+    name = name.encode("utf-8")
+    value = value.encode("utf-8")
+    # 7: string 타입 헤더
+    return struct.pack(">B", len(name)) + name + struct.pack(">BH", 7, len(value)) + value
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """bedrock-runtime REST 경로를 대역 런타임으로 전달"""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        path = unquote(self.path.split("?", 1)[0])
+
+        try:
+            match = _CONVERSE_STREAM.match(path)
+            if match:
+                self._converse_stream(match.group("model"), body)
+                return
+
+            match = _APPLY_GUARDRAIL.match(path)
+            if match:
+                response = self.server.runtime.apply_guardrail(
+                    guardrailIdentifier=match.group("id"),
+                    guardrailVersion=match.group("version"),
+                    source=body["source"],
+                    content=body["content"]
+                )
+                response.pop("ResponseMetadata", None)
+                self._send_json(200, response)
+                return
+
+            self._send_error(404, "ResourceNotFoundException", f"Unknown path: {path}")
+
+        except ClientError as e:
+            error = e.response["Error"]
+            self._send_error(e.response["ResponseMetadata"]["HTTPStatusCode"], error["Code"], error["Message"])
+
+    def _converse_stream(self, model_id, body):
+        """이벤트 스트림을 chunked 전송으로 흘려보냄"""
+        response = self.server.runtime.converse_stream(
+            modelId=model_id,
+            messages=body.get("messages", []),
+            inferenceConfig=body.get("inferenceConfig")
+        )
+        self.send_response(200)
+        self.send_header("Content-Type", "application/vnd.amazon.eventstream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        stream = response["stream"]
+        try:
+            for event in stream:
+                (event_type, payload), = event.items()
+                self._write_chunk(encode_event(event_type, payload))
+            self._write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # 클라이언트가 스트림을 닫으면 생성 중단
+            stream.close()
+            self.close_connection = True
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, code, message):
+        body = json.dumps({"message": message}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("x-amzn-ErrorType", code)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer:
+    """botocore 가 endpoint_url 로 접속할 수 있는 로컬 bedrock-runtime HTTP 서버
+
+    AWS_ENDPOINT_URL_BEDROCK_RUNTIME 환경 변수에 endpoint_url 을 지정하면 기존 코드가 그대로 접속한다.
+    """
+
+    def __init__(self, runtime=None, host="127.0.0.1", port=0):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.runtime = runtime or StubBedrockRuntime()
+        self._thread = None
+
+    @property
+    def endpoint_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """백그라운드 스레드에서 서버 시작"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """서버 종료"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 bedrock-runtime 대역 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--tokens-per-second", type=float, default=60.0)
+    parser.add_argument("--guardrail-latency", type=float, default=0.3, help="가드레일 평균 지연 (초)")
+    parser.add_argument("--guardrail-stddev", type=float, default=0.1)
+    parser.add_argument("--max-tps", type=float, default=None, help="apply_guardrail 허용 TPS")
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--blocked-word", action="append", default=[])
+    parser.add_argument("--trace", default=None, help="다시 내보낼 트레이스 파일 (stub.trace.TraceRecorder 로 기록)")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="트레이스 재생 속도 배율 (0 이면 최대 속도)")
+    args = parser.parse_args()
+
+    runtime = StubBedrockRuntime(
+        tokens_per_second=args.tokens_per_second,
+        guardrail_latency=LatencyModel("lognormal", mean=args.guardrail_latency, stddev=args.guardrail_stddev),
+        blocked_words=args.blocked_word,
+        max_tps=args.max_tps,
+        throttle_rate=args.throttle_rate
+    )
+    if args.trace:
+        # 트레이스에 없는 가드레일 요청은 대역 런타임으로 검사
+        runtime = ReplayBedrockRuntime(Trace.load(args.trace), args.time_scale, fallback=runtime)
+    server = StubServer(runtime, args.host, args.port)
+    print(f"Stub bedrock-runtime listening on {server.endpoint_url}")
+    print(f"export AWS_ENDPOINT_URL_BEDROCK_RUNTIME={server.endpoint_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+import copy
+import gzip
+import json
+import threading
+import time
+from botocore.exceptions import ClientError
+from client.bedrock import get_client, register_client
+from stub.bedrock import StubEventStream
+
+
+def _open(path, mode):
+    """.gz 로 끝나는 경로는 gzip 으로 압축해서 읽고 씀"""
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _prompt(messages):
+    return "".join(block.get("text", "") for message in messages or [] for block in message.get("content", []))
+
+
+class TraceRecorder:
+    """converse_stream 이벤트(도착 시각 포함)와 가드레일 결과를 JSONL 트레이스로 기록
+
+    한 줄에 레코드 하나를 쓴다.
+        {"type": "session", "session": 0, "model": ..., "prompt": ...}
+        {"type": "event", "session": 0, "t": 0.412, "event": {...}}      t: 세션 시작부터 경과 시간(초)
+        {"type": "guardrail", "source": "OUTPUT", "text": ..., "latency": 0.3, "response": {...}}
+    """
+
+    def __init__(self, path, clock=time.monotonic):
+        self.path = path
+        self.clock = clock
+        self.sessions = 0
+        self._file = _open(path, "w")
+        self._lock = threading.Lock()
+
+    def wrap(self, response, model_id=None, prompt=None):
+        """응답의 stream 을 이벤트를 기록하는 반복자로 바꾼 응답 반환 (process_stream 에 그대로 전달)"""
+        with self._lock:
+            session = self.sessions
+            self.sessions += 1
+        self._write({"type": "session", "session": session, "model": model_id, "prompt": prompt})
+        wrapped = dict(response)
+        wrapped["stream"] = _RecordingStream(response["stream"], self, session)
+        return wrapped
+
+    def record_guardrail(self, source, text, response, latency):
+        """apply_guardrail 요청 텍스트와 응답, 호출 지연(초) 기록"""
+        response = {key: value for key, value in response.items() if key != "ResponseMetadata"}
+        self._write({"type": "guardrail", "source": source, "text": text, "latency": round(latency, 6),
+                     "response": response})
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write(self, record):
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str)
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line + "\n")
+                self._file.flush()
+
+
+class _RecordingStream:
+    """이벤트를 받는 대로 기록하며 그대로 내보내는 반복자"""
+
+    def __init__(self, stream, recorder, session):
+        self.stream = stream
+        self.recorder = recorder
+        self.session = session
+
+    def __iter__(self):
+        started = self.recorder.clock()
+        for event in self.stream:
+            self.recorder._write({"type": "event", "session": self.session,
+                                  "t": round(self.recorder.clock() - started, 6), "event": event})
+            yield event
+
+    def close(self):
+        close = getattr(self.stream, "close", None)
+        if close is not None:
+            close()
+
+
+class RecordingRuntime:
+    """bedrock-runtime 클라이언트를 감싸 converse_stream 과 apply_guardrail 결과를 기록하는 클라이언트
+
+    guardrail_client 를 주면 apply_guardrail 은 그 클라이언트로 호출한다.
+    """
+
+    def __init__(self, client, recorder, guardrail_client=None):
+        self.client = client
+        self.recorder = recorder
+        self.guardrail_client = guardrail_client or client
+
+    def converse_stream(self, **kwargs):
+        response = self.client.converse_stream(**kwargs)
+        return self.recorder.wrap(response, kwargs.get("modelId"), _prompt(kwargs.get("messages")))
+
+    def apply_guardrail(self, **kwargs):
+        start = self.recorder.clock()
+        response = self.guardrail_client.apply_guardrail(**kwargs)
+        text = "".join(block["text"]["text"] for block in kwargs.get("content", []) if "text" in block)
+        self.recorder.record_guardrail(kwargs.get("source"), text, response, self.recorder.clock() - start)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+def start_recording(path, regions, profile=None):
+    """해당 리전의 모든 Bedrock 호출을 path 에 기록하도록 클라이언트를 등록하고 TraceRecorder 반환"""
+    recorder = TraceRecorder(path)
+    for region in dict.fromkeys(regions):
+        # 가드레일 호출은 자체 재시도 정책을 쓰므로 botocore 재시도를 끈 클라이언트로 호출
+        register_client(region, RecordingRuntime(get_client(region, profile), recorder,
+                                                 get_client(region, profile, max_attempts=1)))
+    return recorder
+
+
+class Trace:
+    """기록한 트레이스 (세션별 이벤트와 가드레일 결과)"""
+
+    def __init__(self, sessions=None, guardrails=None):
+        self.sessions = sessions or []  # [{"model", "prompt", "events": [(t, event), ...]}]
+        self.guardrails = guardrails or {}  # (source, text) → (response, latency)
+
+    @classmethod
+    def load(cls, path):
+        sessions = {}
+        guardrails = {}
+        with _open(path, "r") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record["type"] == "session":
+                    sessions[record["session"]] = {"model": record.get("model"), "prompt": record.get("prompt"),
+                                                   "events": []}
+                elif record["type"] == "event":
+                    sessions[record["session"]]["events"].append((record["t"], record["event"]))
+                elif record["type"] == "guardrail":
+                    # 같은 요청이 여러 번 기록되었으면 처음 결과를 사용
+                    guardrails.setdefault((record["source"], record["text"]),
+                                          (record["response"], record["latency"]))
+        return cls([sessions[key] for key in sorted(sessions)], guardrails)
+
+    def response(self, index=0, time_scale=1.0):
+        """index 번째 세션을 다시 내보내는 converse_stream 응답 (process_stream 에 그대로 전달)
+
+        time_scale 1 은 기록한 시각 그대로, 0.5 는 두 배 빠르게, 0 은 기다리지 않고 최대 속도로 내보낸다.
+        """
+        events = self.sessions[index]["events"]
+        return {
+            "ResponseMetadata": {"HTTPStatusCode": 200},
+            "stream": StubEventStream(_replay(events, time_scale))
+        }
+
+    def guardrail(self, source, text):
+        """기록된 (응답, 지연) 반환, 없으면 None"""
+        return self.guardrails.get((source, text))
+
+
+def _replay(events, time_scale):
+    started = time.monotonic()
+    for offset, event in events:
+        if time_scale:
+            # 누적 오차가 없도록 시작 시각 기준으로 목표 시각까지 대기
+            remaining = started + offset * time_scale - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+        yield copy.deepcopy(event)
+
+
+class ReplayBedrockRuntime:
+    """트레이스를 그대로 다시 내보내는 bedrock-runtime 대역 (register_client 또는 StubServer 에 사용)
+
+    converse_stream 은 같은 프롬프트로 기록된 세션을, 없으면 기록된 세션을 순서대로 돌아가며 내보낸다.
+    apply_guardrail 은 같은 (source, 텍스트) 로 기록된 응답을 기록된 지연만큼 기다린 뒤 반환한다.
+    버퍼 크기 등이 달라 기록에 없는 텍스트는 fallback 런타임(StubBedrockRuntime 등)으로 검사하고,
+    fallback 이 없으면 ValidationException 을 발생시킨다.
+    """
+
+    def __init__(self, trace, time_scale=1.0, fallback=None):
+        self.trace = trace
+        self.time_scale = time_scale
+        self.fallback = fallback
+
+        self.converse_calls = 0
+        self.guardrail_calls = 0
+        self.guardrail_misses = 0
+        self._lock = threading.Lock()
+
+    def converse_stream(self, modelId=None, messages=None, **kwargs):
+        prompt = _prompt(messages)
+        with self._lock:
+            index = self.converse_calls % len(self.trace.sessions)
+            self.converse_calls += 1
+        for position, session in enumerate(self.trace.sessions):
+            if session["prompt"] == prompt:
+                index = position
+                break
+        return self.trace.response(index, self.time_scale)
+
+    def apply_guardrail(self, guardrailIdentifier, guardrailVersion, source, content, **kwargs):
+        text = "".join(block["text"]["text"] for block in content if "text" in block)
+        recorded = self.trace.guardrail(source, text)
+        with self._lock:
+            self.guardrail_calls += 1
+            if recorded is None:
+                self.guardrail_misses += 1
+
+        if recorded is None:
+            if self.fallback is not None:
+                return self.fallback.apply_guardrail(guardrailIdentifier=guardrailIdentifier,
+                                                     guardrailVersion=guardrailVersion, source=source,
+                                                     content=content, **kwargs)
+            raise ClientError(
+                {"Error": {"Code": "ValidationException", "Message": "트레이스에 기록되지 않은 가드레일 요청입니다."},
+                 "ResponseMetadata": {"HTTPStatusCode": 400}},
+                "ApplyGuardrail"
+            )
+
+        response, latency = recorded
+        if self.time_scale and latency > 0:
+            time.sleep(latency * self.time_scale)
+        response = copy.deepcopy(response)
+        response["ResponseMetadata"] = {"HTTPStatusCode": 200}
+        return response
+
+    def stats(self):
+        """호출 카운터 반환"""
+        with self._lock:
+            return {
+                "converse_calls": self.converse_calls,
+                "guardrail_calls": self.guardrail_calls,
+                "guardrail_misses": self.guardrail_misses
+            }
@@ -0,0 +1,286 @@
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from guardrails.local import AhoCorasick, RegexSet
+
+
+ENGLISH_LETTERS = "abcdefghijklmnopqrstuvwxyz"
+ENGLISH_WORDS = ["the", "guardrail", "checks", "each", "buffer", "before", "it", "is", "shown", "to", "user",
+                 "streaming", "response", "latency", "and", "cost", "depend", "on", "how", "often", "called"]
+KOREAN_WORDS = ["안녕하세요", "테스트", "문장", "입니다", "생성된", "텍스트", "가드레일", "응답은", "버퍼", "단위로",
+                "나누어", "검사할", "수", "있습니다", "지연", "시간과", "비용이", "줄어듭니다"]
+
+RESULT_FIELDS = ["target", "implementation", "language", "policy_size", "text_size", "matches", "runs", "stable",
+                 "mean_us", "stdev_us", "ci95_us", "min_us", "p50_us", "p95_us", "p99_us",
+                 "build_ms", "memory_kb", "skipped"]
+
+
+def generate_words(count, language, rng):
+    """중복되지 않는 커스텀 단어 목록 생성 (영어: 5~10 글자, 한국어: 2~5 음절)"""
+    words = set()
+    while len(words) < count:
+        if language == "ko":
+            word = "".join(chr(0xAC00 + rng.randrange(11172)) for _ in range(rng.randint(2, 5)))
+        else:
+            word = "".join(rng.choices(ENGLISH_LETTERS, k=rng.randint(5, 10)))
+        words.add(word)
+    return sorted(words)
+
+
+def generate_patterns(count, rng):
+    """중복되지 않는 정규식 패턴 목록 생성 (test_latency.generate_test_patterns 와 같은 형식)"""
+    patterns = set()
+    while len(patterns) < count:
+        patterns.add(f"test{''.join(rng.choices(ENGLISH_LETTERS, k=5))}[a-z]+")
+    return sorted(patterns)
+
+
+def generate_text(size, language, needles, rng):
+    """size 글자의 본문을 만들고 needles 를 임의 위치에 넣음"""
+    vocabulary = KOREAN_WORDS if language == "ko" else ENGLISH_WORDS
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(needles) if needles and rng.random() < 0.002 else rng.choice(vocabulary)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:size]
+
+
+class NaiveWords:
+    """단어마다 부분 문자열 검색 (test_latency.LocalGuardrail 방식)"""
+
+    def __init__(self, words):
+        self.words = set(words)
+
+    def findall(self, text):
+        return [word for word in self.words if word in text]
+
+
+class CombinedRegexWords:
+    """모든 단어를 하나의 분기 정규식으로 검색 (긴 단어 우선)"""
+
+    def __init__(self, words):
+        words = sorted(words, key=len, reverse=True)
+        self.pattern = re.compile("|".join(re.escape(word) for word in words))
+
+    def findall(self, text):
+        return list(dict.fromkeys(match.group() for match in self.pattern.finditer(text)))
+
+
+class NaivePatterns:
+    """정규식마다 전체 텍스트 검색"""
+
+    def __init__(self, patterns):
+        self.patterns = [re.compile(pattern) for pattern in patterns]
+
+    def findall(self, text):
+        return [pattern.pattern for pattern in self.patterns if pattern.search(text)]
+
+
+class RegexSetPatterns:
+    """리터럴 접두사 사전 필터를 쓰는 guardrails.local.RegexSet"""
+
+    def __init__(self, patterns):
+        self.regexes = RegexSet(patterns)
+
+    def findall(self, text):
+        return list(dict.fromkeys(name for name, _, _ in self.regexes.finditer(text)))
+
+
+IMPLEMENTATIONS = {
+    "words": {
+        "naive": NaiveWords,
+        "regex": CombinedRegexWords,
+        # 정규화 비용까지 같은 조건으로 비교하도록 대소문자 구분
+        "automaton": lambda words: AhoCorasick(words, case_sensitive=True)
+    },
+    "patterns": {
+        "naive": NaivePatterns,
+        "regex_set": RegexSetPatterns
+    }
+}
+
+
+def build(factory, policy):
+    """(매처, 생성 시간(ms), 유지 메모리(KB)) 반환 (메모리는 tracemalloc 으로 따로 생성해서 측정)"""
+    start = time.perf_counter_ns()
+    matcher = factory(policy)
+    build_ms = (time.perf_counter_ns() - start) / 1e6
+
+    # re 모듈 캐시에 남은 컴파일 결과를 재사용하지 않도록 비움
+    re.purge()
+    tracemalloc.start()
+    try:
+        measured = factory(policy)
+        memory_kb = tracemalloc.get_traced_memory()[0] / 1024
+    finally:
+        tracemalloc.stop()
+    del measured
+    return matcher, build_ms, memory_kb
+
+
+def measure(func, text, warmup, min_runs, max_runs, max_time, target_ci):
+    """워밍업 후 평균의 95% 신뢰구간 폭이 평균의 target_ci 이하가 될 때까지 반복 측정 (ns 단위 표본 반환)
+
+    max_time 초를 넘기면 안정되지 않았어도 멈추고, 한 번 실행이 max_time 을 넘으면 표본 하나만 남긴다.
+    """
+    start = time.perf_counter_ns()
+    func(text)
+    probe = time.perf_counter_ns() - start
+    if probe > max_time * 1e9:
+        return [probe], False
+
+    for _ in range(warmup - 1):
+        func(text)
+
+    samples = []
+    deadline = time.perf_counter_ns() + max_time * 1e9
+    stable = False
+    while len(samples) < max_runs:
+        started = time.perf_counter_ns()
+        func(text)
+        samples.append(time.perf_counter_ns() - started)
+        if len(samples) >= min_runs:
+            mean = statistics.fmean(samples)
+            ci = 1.96 * statistics.stdev(samples) / len(samples) ** 0.5
+            if mean and ci / mean <= target_ci:
+                stable = True
+                break
+            if time.perf_counter_ns() > deadline:
+                break
+    return samples, stable
+
+
+def percentile(values, p):
+    """선형 보간 백분위수"""
+    values = sorted(values)
+    rank = (len(values) - 1) * p / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (rank - lower)
+
+
+def summarize(samples):
+    """ns 표본을 us 단위 통계로 변환"""
+    values = [sample / 1000 for sample in samples]
+    stdev = statistics.stdev(values) if len(values) > 1 else 0.0
+    return {
+        "runs": len(values),
+        "mean_us": statistics.fmean(values),
+        "stdev_us": stdev,
+        "ci95_us": 1.96 * stdev / len(values) ** 0.5,
+        "min_us": min(values),
+        "p50_us": percentile(values, 50),
+        "p95_us": percentile(values, 95),
+        "p99_us": percentile(values, 99)
+    }
+
+
+def run_benchmark(args):
+    """대상·언어·정책 크기·텍스트 크기·구현별 측정 결과 목록 반환"""
+    results = []
+    targets = [("words", args.word_counts, args.languages), ("patterns", args.pattern_counts, ["en"])]
+    for target, policy_sizes, languages in targets:
+        implementations = {name: factory for name, factory in IMPLEMENTATIONS[target].items()
+                           if target == "patterns" or name in args.implementations}
+        for language in languages:
+            # 시간 예산을 넘긴 구현은 정책과 텍스트가 모두 그 이상인 경우를 측정하지 않음
+            exceeded = {name: [] for name in implementations}
+            for policy_size in policy_sizes:
+                rng = random.Random(args.seed)
+                if target == "words":
+                    policy = generate_words(policy_size, language, rng)
+                    needles = rng.sample(policy, min(10, len(policy)))
+                else:
+                    policy = generate_patterns(policy_size, rng)
+                    needles = [f"test{pattern[4:9]}abc" for pattern in rng.sample(policy, min(10, len(policy)))]
+
+                matchers = {}
+                for name, factory in implementations.items():
+                    if _exceeded(exceeded[name], policy_size, min(args.text_sizes)):
+                        continue
+                    print(f"Building {target}/{name} with {policy_size} entries ({language})...")
+                    matchers[name] = build(factory, policy)
+
+                for text_size in args.text_sizes:
+                    text = generate_text(text_size, language, needles, random.Random(args.seed + text_size))
+                    for name in implementations:
+                        row = {"target": target, "implementation": name, "language": language,
+                               "policy_size": policy_size, "text_size": text_size}
+                        if name not in matchers or _exceeded(exceeded[name], policy_size, text_size):
+                            row["skipped"] = "time budget exceeded at a smaller size"
+                            results.append(row)
+                            continue
+
+                        matcher, build_ms, memory_kb = matchers[name]
+                        samples, stable = measure(matcher.findall, text, args.warmup, args.min_runs, args.max_runs,
+                                                  args.max_time, args.target_ci)
+                        row.update(summarize(samples))
+                        row.update({"matches": len(matcher.findall(text)), "stable": stable,
+                                    "build_ms": build_ms, "memory_kb": memory_kb})
+                        if len(samples) == 1:
+                            row["skipped"] = "single run exceeded max time"
+                            exceeded[name].append((policy_size, text_size))
+                        results.append(row)
+                        print(f"  {name:10s} text={text_size:>7d} p50={row['p50_us']:>12.1f}us "
+                              f"p99={row['p99_us']:>12.1f}us runs={row['runs']} stable={stable}")
+    return results
+
+
+def _exceeded(limits, policy_size, text_size):
+    return any(policy_size >= policy and text_size >= text for policy, text in limits)
+
+
+def write_csv(results, file_path):
+    with open(file_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        for row in results:
+            writer.writerow({field: row.get(field) for field in RESULT_FIELDS})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 사전 검사 매처 마이크로벤치마크")
+    parser.add_argument("--word-counts", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--pattern-counts", type=int, nargs="*", default=[100, 1000])
+    parser.add_argument("--text-sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--languages", nargs="+", default=["ko", "en"], choices=["ko", "en"])
+    parser.add_argument("--implementations", nargs="*", default=["naive", "regex", "automaton"],
+                        choices=["naive", "regex", "automaton"], help="단어 검사 구현 (패턴 검사는 항상 모두 측정)")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--min-runs", type=int, default=10)
+    parser.add_argument("--max-runs", type=int, default=1000)
+    parser.add_argument("--max-time", type=float, default=2.0, help="측정 한 건의 최대 시간 (초)")
+    parser.add_argument("--target-ci", type=float, default=0.02, help="평균 대비 95%% 신뢰구간 폭 목표")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="benchmark_local_matcher.json", help="JSON 결과 파일")
+    parser.add_argument("--csv", default=None, help="CSV 결과 파일")
+    args = parser.parse_args()
+
+    results = run_benchmark(args)
+    with open(args.output, 'w') as f:
+        json.dump({
+            "environment": {"python": platform.python_version(), "implementation": platform.python_implementation(),
+                            "platform": platform.platform(), "processor": platform.processor()},
+            "config": vars(args),
+            "results": results
+        }, f, ensure_ascii=False, indent=2)
+    if args.csv:
+        write_csv(results, args.csv)
+    print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from client.bedrock import register_client, unregister_client
+from llm.bedrock import get_streaming_response
+from buffer_manager.renderer import NullBlock, Renderer
+from buffer_manager.post_guardrail_manager import PostGuardrailManager
+from buffer_manager.pre_guardrail_manager import PreGuardrailManager
+from buffer_manager.dynamic_guardrail_manager import DynamicGuardrailManager
+from stub.bedrock import LatencyModel, StubBedrockRuntime
+from stub.trace import ReplayBedrockRuntime, Trace
+
+
+REGION = "benchmark"
+GUARDRAIL_CONFIG = {
+    "region": REGION,
+    "guardrail_id": "benchmark",
+    "guardrail_version": "1",
+    "use_cache": False  # 세션 간 같은 텍스트가 캐시되어 호출 수가 줄지 않도록
+}
+
+METRICS = ["ttft", "completion_time", "stall_time", "guardrail_calls", "text_units", "cpu_time"]
+PERCENTILES = [50, 95, 99]
+
+
+class TimingBlock(NullBlock):
+    """처음으로 텍스트가 표시된 시각을 기록하는 블록"""
+
+    def __init__(self, renderer):
+        self.renderer = renderer
+
+    def write(self, text):
+        if text and self.renderer.first_display is None:
+            self.renderer.first_display = time.monotonic()
+
+    def append(self, text):
+        self.write(text)
+
+
+class TimingRenderer(Renderer):
+    """화면 대신 첫 표시 시각만 기록하는 렌더러 (세 관리자 모두 같은 기준으로 첫 응답 시간을 잼)"""
+
+    def __init__(self):
+        self.first_display = None
+
+    def new_block(self):
+        return TimingBlock(self)
+
+
+def create_manager(kind, renderer, args):
+    """관리자 종류와 버퍼 설정으로 관리자 생성"""
+    if kind == "post":
+        return PostGuardrailManager(renderer, args.buffer_size, GUARDRAIL_CONFIG, False)
+    if kind == "pre":
+        return PreGuardrailManager(renderer, args.buffer_size, GUARDRAIL_CONFIG, False, pipelined=args.pipelined,
+                                   playout_cps=args.playout_cps)
+    if kind == "dynamic":
+        return DynamicGuardrailManager(renderer, args.initial_buffer_size, args.second_buffer_size,
+                                       args.subsequent_buffer_size, GUARDRAIL_CONFIG, False,
+                                       pipelined=args.pipelined, playout_cps=args.playout_cps)
+    raise ValueError(f"알 수 없는 관리자: {kind}")
+
+
+def create_runtime(args, seed, trace=None):
+    """합성 스트림 대역 런타임 (트레이스를 주면 seed 번째 기록 세션을 재생하고 기록에 없는 검사만 대역으로 처리)"""
+    stub = StubBedrockRuntime(
+        tokens_per_second=args.tokens_per_second,
+        first_token_latency=LatencyModel("lognormal", mean=args.first_token_latency, stddev=args.first_token_latency / 3,
+                                         seed=seed),
+        guardrail_latency=LatencyModel(args.latency_distribution, mean=args.guardrail_latency,
+                                       stddev=args.guardrail_stddev, seed=seed),
+        blocked_words=args.blocked_word,
+        seed=seed
+    )
+    if trace is not None:
+        # 세션 하나만 남겨 프롬프트와 관계없이 그 세션을 재생
+        session = trace.sessions[seed % len(trace.sessions)]
+        return ReplayBedrockRuntime(Trace([session], trace.guardrails), fallback=stub)
+    return stub
+
+
+def run_session(kind, args, index, trace=None):
+    """세션 하나를 실행하고 측정값 반환"""
+    # 관리자마다 같은 시드를 써서 같은 응답과 같은 지연 분포로 비교
+    runtime = create_runtime(args, seed=index, trace=trace)
+    register_client(REGION, runtime)
+    renderer = TimingRenderer()
+    manager = create_manager(kind, renderer, args)
+
+    cpu_start = time.process_time()
+    start = time.monotonic()
+    response = get_streaming_response(f"benchmark prompt {index}", "benchmark-model", REGION)
+    manager.process_stream(response)
+    completion_time = time.monotonic() - start
+    cpu_time = time.process_time() - cpu_start
+    unregister_client(REGION)
+
+    summary = manager.metrics_summary
+    return {
+        "manager": kind,
+        "session": index,
+        "ttft": renderer.first_display - start if renderer.first_display is not None else None,
+        "completion_time": completion_time,
+        "stall_time": summary["stall_time"] or 0.0,
+        "guardrail_calls": summary["usage"]["calls"],
+        "text_units": summary["usage"]["text_units"],
+        "cpu_time": cpu_time,
+        "output_chars": summary["output_chars"],
+        "blocked": summary["blocked"]
+    }
+
+
+def percentile(values, p):
+    """선형 보간 백분위수"""
+    values = sorted(values)
+    if not values:
+        return None
+    rank = (len(values) - 1) * p / 100
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    return values[lower] + (values[upper] - values[lower]) * (rank - lower)
+
+
+def summarize(sessions):
+    """관리자별 측정값의 p50/p95/p99 계산"""
+    summary = {}
+    for kind in dict.fromkeys(session["manager"] for session in sessions):
+        rows = [session for session in sessions if session["manager"] == kind]
+        summary[kind] = {"sessions": len(rows)}
+        for metric in METRICS:
+            values = [row[metric] for row in rows if row[metric] is not None]
+            summary[kind][metric] = {f"p{p}": percentile(values, p) for p in PERCENTILES}
+    return summary
+
+
+def write_csv(summary, file_path):
+    """관리자·지표별 백분위수를 CSV 로 저장"""
+    with open(file_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["manager", "metric"] + [f"p{p}" for p in PERCENTILES])
+        for kind, metrics in summary.items():
+            for metric in METRICS:
+                writer.writerow([kind, metric] + [metrics[metric][f"p{p}"] for p in PERCENTILES])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="버퍼 관리자 방식별 오프라인 벤치마크")
+    parser.add_argument("--managers", nargs="+", default=["post", "pre", "dynamic"],
+                        choices=["post", "pre", "dynamic"])
+    parser.add_argument("--sessions", type=int, default=20, help="관리자별 세션 수")
+    parser.add_argument("--trace", default=None, help="합성 스트림 대신 재생할 트레이스 (stub.trace)")
+    parser.add_argument("--tokens-per-second", type=float, default=60.0)
+    parser.add_argument("--first-token-latency", type=float, default=0.5, help="첫 토큰 평균 지연 (초)")
+    parser.add_argument("--latency-distribution", default="lognormal", choices=["constant", "uniform", "lognormal"])
+    parser.add_argument("--guardrail-latency", type=float, default=0.3, help="가드레일 평균 지연 (초)")
+    parser.add_argument("--guardrail-stddev", type=float, default=0.1)
+    parser.add_argument("--blocked-word", action="append", default=[])
+    parser.add_argument("--buffer-size", type=int, default=1000, help="post / pre 버퍼 크기")
+    parser.add_argument("--initial-buffer-size", type=int, default=100)
+    parser.add_argument("--second-buffer-size", type=int, default=500)
+    parser.add_argument("--subsequent-buffer-size", type=int, default=1000)
+    parser.add_argument("--pipelined", action="store_true", help="pre / dynamic 의 백그라운드 검사 사용")
+    parser.add_argument("--playout-cps", type=float, default=300)
+    parser.add_argument("--output", default="benchmark_managers.json", help="JSON 결과 파일")
+    parser.add_argument("--csv", default=None, help="CSV 결과 파일")
+    args = parser.parse_args()
+
+    trace = Trace.load(args.trace) if args.trace else None
+    sessions = []
+    for kind in args.managers:
+        print(f"Running {args.sessions} sessions with {kind} manager...")
+        for index in range(args.sessions):
+            sessions.append(run_session(kind, args, index, trace))
+
+    summary = summarize(sessions)
+    with open(args.output, 'w') as f:
+        json.dump({"config": vars(args), "summary": summary, "sessions": sessions}, f, ensure_ascii=False, indent=2)
+    if args.csv:
+        write_csv(summary, args.csv)
+
+    # 결과 출력
+    print("\nBenchmark Results (p50 / p95 / p99):")
+    print("-" * 50)
+    for kind, metrics in summary.items():
+        print(f"\n{kind} ({metrics['sessions']} sessions)")
+        for metric in METRICS:
+            values = " / ".join("-" if value is None else f"{value:.3f}" for value in metrics[metric].values())
+            print(f"  {metric}: {values}")
+    print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import argparse
+import itertools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from client.bedrock import configure, register_client
+from guardrails.bedrock import limiter
+from llm.bedrock import get_streaming_response
+from buffer_manager.dispatcher import dispatcher
+from stub.bedrock import LatencyModel, StubBedrockRuntime
+from benchmark_managers import REGION, TimingRenderer, create_manager, percentile
+
+
+PERCENTILES = [50, 95, 99]
+
+
+class LoadRenderer(TimingRenderer):
+    """첫 표시 시각과 처리 오류를 기록하는 렌더러"""
+
+    def __init__(self):
+        super().__init__()
+        self.error_message = None
+
+    def error(self, message):
+        self.error_message = message
+
+
+def process_usage():
+    """(누적 CPU 시간(초), 현재 RSS(MB)) 반환 (/proc 이 없으면 최대 RSS)"""
+    cpu_time = time.process_time()
+    try:
+        with open("/proc/self/statm") as f:
+            rss_pages = int(f.read().split()[1])
+        rss_mb = rss_pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError):
+        # macOS 는 바이트, Linux 는 KB 단위
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        rss_mb = max_rss / 1024 / 1024 if sys.platform == "darwin" else max_rss / 1024
+    return cpu_time, rss_mb
+
+
+def run_session(kind, args, index):
+    """세션 하나를 실행하고 측정값 반환"""
+    renderer = LoadRenderer()
+    manager = create_manager(kind, renderer, args)
+    start = time.monotonic()
+    try:
+        response = get_streaming_response(f"load test prompt {index}", "load-test-model", REGION)
+        manager.process_stream(response)
+        error = renderer.error_message
+    except Exception as e:
+        error = str(e)
+    completion_time = time.monotonic() - start
+
+    summary = manager.metrics_summary or {}
+    return {
+        "manager": kind,
+        "ttft": renderer.first_display - start if renderer.first_display is not None else None,
+        "completion_time": completion_time,
+        "stall_time": summary.get("stall_time") or 0.0,
+        "output_chars": summary.get("output_chars", 0),
+        "guardrail_calls": (summary.get("usage") or {}).get("calls", 0),
+        "error": error
+    }
+
+
+def run_stage(concurrency, args, runtime, counter):
+    """concurrency 개의 세션을 동시에 유지하며 stage_duration 동안 실행하고 단계 결과 반환"""
+    sessions = []
+    lock = threading.Lock()
+    stop_at = time.monotonic() + args.stage_duration
+    peak_threads = [threading.active_count()]
+
+    def worker(offset):
+        # 동시에 몰리지 않도록 ramp_time 동안 나누어 시작
+        time.sleep(offset)
+        while time.monotonic() < stop_at:
+            index = next(counter)
+            result = run_session(args.managers[index % len(args.managers)], args, index)
+            with lock:
+                sessions.append(result)
+                peak_threads[0] = max(peak_threads[0], threading.active_count())
+
+    runtime_before = runtime.stats() if runtime is not None else None
+    limiter_before = limiter.stats()
+    cpu_before, _ = process_usage()
+    started = time.monotonic()
+
+    threads = [
+        threading.Thread(target=worker, args=(args.ramp_time * index / concurrency,), daemon=True)
+        for index in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    elapsed = time.monotonic() - started
+    cpu_after, rss_mb = process_usage()
+    limiter_after = limiter.stats()
+
+    completed = [session for session in sessions if session["error"] is None]
+    stage = {
+        "concurrency": concurrency,
+        "elapsed": elapsed,
+        "sessions": len(sessions),
+        "errors": len(sessions) - len(completed),
+        "sessions_per_second": len(completed) / elapsed,
+        "output_chars_per_second": sum(session["output_chars"] for session in completed) / elapsed,
+        "guardrail_calls_per_second": sum(session["guardrail_calls"] for session in sessions) / elapsed,
+        "limiter_throttles": limiter_after["throttles"] - limiter_before["throttles"],
+        "limiter_rate": limiter_after["rate"],
+        "limiter_concurrency": limiter_after["concurrency"],
+        "dispatcher_average_wait": dispatcher.stats()["average_wait"],
+        "cpu_percent": 100 * (cpu_after - cpu_before) / elapsed,
+        "rss_mb": rss_mb,
+        "peak_threads": peak_threads[0]
+    }
+    if runtime is not None:
+        runtime_after = runtime.stats()
+        stage["throttled_calls"] = runtime_after["throttled_calls"] - runtime_before["throttled_calls"]
+    for metric in ("ttft", "stall_time", "completion_time"):
+        values = [session[metric] for session in completed if session[metric] is not None]
+        stage[metric] = {f"p{p}": percentile(values, p) for p in PERCENTILES}
+    if args.include_sessions:
+        stage["session_results"] = sessions
+    return stage
+
+
+def print_stage(stage):
+    def tail(metric):
+        return " / ".join("-" if value is None else f"{value:.2f}" for value in stage[metric].values())
+
+    print(f"  sessions: {stage['sessions']} (errors {stage['errors']}), "
+          f"{stage['sessions_per_second']:.2f} sessions/s, {stage['output_chars_per_second']:.0f} chars/s, "
+          f"{stage['guardrail_calls_per_second']:.1f} guardrail calls/s")
+    print(f"  ttft p50/p95/p99: {tail('ttft')}s, stall: {tail('stall_time')}s, "
+          f"completion: {tail('completion_time')}s")
+    print(f"  throttles: {stage.get('throttled_calls', '-')} (limiter {stage['limiter_throttles']}, "
+          f"rate {stage['limiter_rate']:.1f}/s, concurrency {stage['limiter_concurrency']})")
+    print(f"  cpu: {stage['cpu_percent']:.0f}%, rss: {stage['rss_mb']:.0f}MB, threads: {stage['peak_threads']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="스트리밍 가드레일 파이프라인 다중 세션 부하 생성기")
+    parser.add_argument("--stages", type=int, nargs="+", default=[50, 100, 200, 500], help="단계별 동시 세션 수")
+    parser.add_argument("--stage-duration", type=float, default=30.0, help="단계별 새 세션을 시작하는 시간 (초)")
+    parser.add_argument("--ramp-time", type=float, default=5.0, help="단계 시작 시 세션을 나누어 시작하는 시간 (초)")
+    parser.add_argument("--managers", nargs="+", default=["post", "pre", "dynamic"],
+                        choices=["post", "pre", "dynamic"], help="세션마다 돌아가며 사용할 관리자")
+    parser.add_argument("--endpoint", default=None,
+                        help="외부 대역 서버 주소 (python -m stub.server), 없으면 프로세스 안의 대역 사용")
+    parser.add_argument("--tokens-per-second", type=float, default=60.0)
+    parser.add_argument("--first-token-latency", type=float, default=0.5)
+    parser.add_argument("--guardrail-latency", type=float, default=0.3, help="가드레일 평균 지연 (초)")
+    parser.add_argument("--guardrail-stddev", type=float, default=0.1)
+    parser.add_argument("--max-tps", type=float, default=None, help="대역 apply_guardrail 허용 TPS")
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--buffer-size", type=int, default=1000, help="post / pre 버퍼 크기")
+    parser.add_argument("--initial-buffer-size", type=int, default=100)
+    parser.add_argument("--second-buffer-size", type=int, default=500)
+    parser.add_argument("--subsequent-buffer-size", type=int, default=1000)
+    parser.add_argument("--pipelined", action="store_true", help="pre / dynamic 의 백그라운드 검사 사용")
+    parser.add_argument("--playout-cps", type=float, default=300)
+    parser.add_argument("--include-sessions", action="store_true", help="세션별 측정값도 저장")
+    parser.add_argument("--output", default="load_generator.json", help="JSON 결과 파일")
+    args = parser.parse_args()
+
+    # 가장 큰 단계의 동시 세션이 커넥션 풀에서 기다리지 않도록
+    configure(max_pool_connections=max(args.stages))
+
+    runtime = None
+    if args.endpoint:
+        os.environ["AWS_ENDPOINT_URL_BEDROCK_RUNTIME"] = args.endpoint
+        # 대역 서버는 서명을 확인하지 않으므로 자격 증명이 없으면 임의 값 사용
+        os.environ.setdefault("AWS_ACCESS_KEY_ID", "load-test")
+        os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "load-test")
+    else:
+        runtime = StubBedrockRuntime(
+            tokens_per_second=args.tokens_per_second,
+            first_token_latency=LatencyModel("lognormal", mean=args.first_token_latency,
+                                             stddev=args.first_token_latency / 3),
+            guardrail_latency=LatencyModel("lognormal", mean=args.guardrail_latency, stddev=args.guardrail_stddev),
+            max_tps=args.max_tps,
+            throttle_rate=args.throttle_rate
+        )
+        register_client(REGION, runtime)
+
+    counter = itertools.count()
+    stages = []
+    for concurrency in args.stages:
+        print(f"\nStage: {concurrency} concurrent sessions for {args.stage_duration:.0f}s...")
+        stage = run_stage(concurrency, args, runtime, counter)
+        print_stage(stage)
+        stages.append(stage)
+
+    with open(args.output, 'w') as f:
+        json.dump({"config": vars(args), "stages": stages}, f, ensure_ascii=False, indent=2)
+    print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
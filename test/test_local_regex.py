@@ -0,0 +1,46 @@
+import os
+import random
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from guardrails.local import LocalGuardrail, RegexSet
+
+
+PATTERN_PARTS = [r"\d{2}", r"\d{4}", "-", "ab", "a+", "b?", r"[a-c]", r"\w", "x", r"\s", r"\b"]
+
+
+def per_pattern_matches(patterns, text):
+    """패턴마다 re.finditer 로 찾은 (패턴, 시작, 끝) 집합"""
+    return {
+        (pattern, match.start(), match.end())
+        for pattern in patterns
+        for match in re.finditer(pattern, text)
+    }
+
+
+def test_overlapping_patterns_are_all_detected():
+    """겹치는 매치가 있어도 앞에 나열된 패턴 때문에 다른 패턴을 놓치지 않음"""
+    guardrail = LocalGuardrail(regexes=[
+        {"name": "Num", "pattern": r"\d{4}-\d{4}", "action": "ANONYMIZE"},
+        {"name": "Card", "pattern": r"\d{4}-\d{4}-\d{4}-\d{4}", "action": "BLOCK"}
+    ])
+    status, violations, _ = guardrail.check("카드 번호 1234-5678-9012-3456 입니다")
+    assert status == "blocked"
+    assert {violation["Name"] for violation in violations} == {"Num", "Card"}
+
+
+def test_regex_set_matches_per_pattern_search():
+    """임의의 패턴·텍스트에서 RegexSet 결과가 패턴별 re.finditer 결과와 같음"""
+    rng = random.Random(0)
+    for _ in range(3000):
+        patterns = list(dict.fromkeys(
+            "".join(rng.choice(PATTERN_PARTS) for _ in range(rng.randint(1, 4)))
+            for _ in range(rng.randint(1, 5))
+        ))
+        patterns = [pattern for pattern in patterns if not re.fullmatch(pattern, "")] or ["x"]
+        text = "".join(rng.choice("0123456789-abcx ") for _ in range(rng.randint(0, 40)))
+
+        found = set(RegexSet(patterns).finditer(text))
+        assert found == per_pattern_matches(patterns, text), (patterns, text)
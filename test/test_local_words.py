@@ -0,0 +1,39 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from guardrails.local import AhoCorasick, LocalGuardrail, StreamingMatcher
+
+
+def test_substring_matching_is_default():
+    """기본은 부분 문자열 일치"""
+    guardrail = LocalGuardrail(["ass"])
+    assert guardrail.check("a classic example")[0] == "blocked"
+
+
+def test_whole_words_skips_matches_inside_words():
+    """whole_words 이면 단어 안에 포함된 일치는 무시"""
+    guardrail = LocalGuardrail(["ass"], whole_words=True)
+    assert guardrail.check("a classic example")[0] == "passed"
+    assert guardrail.check("what an ass.")[0] == "blocked"
+    assert guardrail.check("Ass")[0] == "blocked"
+
+
+def test_streaming_whole_words_matches_full_text():
+    """델타를 어떻게 나누어도 스트리밍 결과가 전체 텍스트 검사 결과와 같음 (스트림 마지막 글자에서 끝난 단어 제외)"""
+    rng = random.Random(0)
+    automaton = AhoCorasick(["ab", "b", "abc", "c_d"], whole_words=True)
+    for _ in range(2000):
+        text = "".join(rng.choice("abcd _.") for _ in range(rng.randint(0, 30)))
+        expected = [(automaton.words[index], end) for end, index in automaton.iter(text) if end < len(text) - 1]
+
+        matcher = StreamingMatcher(automaton)
+        found = []
+        position = 0
+        while position < len(text):
+            size = rng.randint(0, 4)
+            found.extend(matcher.feed(text[position:position + size]))
+            position += size
+        assert sorted(found) == sorted(expected), text
@@ -0,0 +1,70 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from buffer_manager.post_guardrail_manager import PostGuardrailManager
+from buffer_manager.pre_guardrail_manager import PreGuardrailManager
+from buffer_manager.renderer import Renderer
+from buffer_manager.segmenter import Segmenter, align_filtered
+from client.bedrock import register_client
+from llm.bedrock import get_streaming_response
+from stub.bedrock import StubBedrockRuntime
+
+CONFIG = {"region": "local", "guardrail_id": "stub", "guardrail_version": "1", "use_cache": False}
+REGEXES = [{"name": "NAME", "pattern": r"John Smith", "action": "ANONYMIZE"}]
+
+
+class RecordingBlock:
+    def __init__(self):
+        self.text = ""
+
+    def write(self, text):
+        self.text = text
+
+
+class RecordingRenderer(Renderer):
+    """블록에 마지막으로 쓴 내용을 모아 화면에 보이는 텍스트를 재구성"""
+
+    def __init__(self):
+        self.blocks = []
+
+    def new_block(self):
+        block = RecordingBlock()
+        self.blocks.append(block)
+        return block
+
+    def shown(self):
+        return "".join(block.text for block in self.blocks)
+
+
+def run_session(manager, text):
+    register_client("local", StubBedrockRuntime(response_text=text, regexes=REGEXES, time_scale=0))
+    return manager.process_stream(get_streaming_response("q", "model", "local"))
+
+
+def test_align_filtered_moves_out_of_replaced_span():
+    """치환된 구간 안의 위치는 구간 끝으로, 바깥 위치는 그대로 대응"""
+    text = "hi John Smith bye"
+    filtered = "hi {NAME} bye"
+    assert align_filtered(text, filtered, text.index("Smith")) == (text.index(" bye"), filtered.index(" bye"))
+    assert align_filtered(text, filtered, text.index("John")) == (text.index("John"), filtered.index("{NAME}"))
+    assert align_filtered(text, filtered, text.index("bye")) == (text.index("bye"), filtered.index("bye"))
+
+
+def test_overlap_tail_inside_anonymized_entity():
+    """겹침 꼬리가 여러 단어로 된 비식별화 대상 중간에서 시작해도 원문이 새거나 사라지지 않음"""
+    text = "aaaa " * 58 + "John Smith bb cc dd ee " + "ffff " * 100
+    expected = text.replace("John Smith", "{NAME}")
+    # 318 에서 자르면 겹침 꼬리가 "Smith" 에서 시작
+    for create in (
+        lambda renderer: PostGuardrailManager(renderer, 318, CONFIG, False, segmenter=Segmenter(0, 20),
+                                              render_fps=0),
+        lambda renderer: PreGuardrailManager(renderer, 318, CONFIG, False, segmenter=Segmenter(0, 20),
+                                             playout_cps=1e7),
+        lambda renderer: PreGuardrailManager(renderer, 318, CONFIG, False, pipelined=True,
+                                             segmenter=Segmenter(0, 20), playout_cps=1e7),
+    ):
+        renderer = RecordingRenderer()
+        assert run_session(create(renderer), text) == expected
+        assert renderer.shown() == expected
@@ -0,0 +1,38 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from buffer_manager.dynamic_guardrail_manager import DynamicGuardrailManager
+from buffer_manager.segmenter import Segmenter
+from client.bedrock import register_client
+from llm.bedrock import get_streaming_response
+from stub.bedrock import StubBedrockRuntime
+
+CONFIG = {"region": "local", "guardrail_id": "stub", "guardrail_version": "1", "use_cache": False}
+
+
+def test_zero_size_cuts_at_last_boundary():
+    """목표 크기가 0 이어도 어절 중간에서 자르지 않고, 경계가 없으면 기다림"""
+    segmenter = Segmenter()
+    assert segmenter.split("연락처는 010-", 0) == (5, 5)
+    assert segmenter.split("010-1234", 0) is None
+    assert segmenter.split("끝났습니다. 다음", 0) == (7, 7)
+    assert segmenter.split("끝났습니다. 다음 ", 0) == (10, 10)
+    assert segmenter.split("010-1234", 0, final=True) == (8, 8)
+
+
+def test_zero_size_keeps_overlap_tail():
+    """목표 크기가 0 일 때도 문장 경계가 아니면 꼬리를 남김"""
+    assert Segmenter(overlap=4).split("hello big world ", 0) == (16, 10)
+
+
+def test_zero_second_buffer_does_not_split_entity():
+    """두 번째 버퍼 크기가 0 이어도 델타 사이에 걸친 전화번호가 비식별화됨"""
+    text = "연락처는 010-1234-5678 입니다. " + "안내를 계속합니다. " * 30
+    regexes = [{"name": "PHONE", "pattern": r"010-\d{4}-\d{4}", "action": "ANONYMIZE"}]
+    register_client("local", StubBedrockRuntime(response_text=text, regexes=regexes, time_scale=0))
+
+    manager = DynamicGuardrailManager(None, 0, 0, 300, CONFIG, False)
+    output = manager.process_stream(get_streaming_response("q", "model", "local"))
+    assert output == text.replace("010-1234-5678", "{PHONE}")